@@ -0,0 +1,156 @@
+import json
+import os
+from typing import Dict, List, Tuple
+from model.query import Query
+
+
+def journal_path(filename: str) -> str:
+    """Return the journal file that belongs to a saved-answers file (answers.json -> answers.jsonl)."""
+    return os.path.splitext(filename)[0] + ".jsonl"
+
+
+def _read_journal(path: str) -> Tuple[List[Dict], int]:
+    """
+    Read the records of a journal file.
+
+    :return: The records and the length in bytes of the intact part of the file. A final
+        line that is incomplete (the process died while writing it) is left out.
+    """
+    if not os.path.exists(path):
+        return [], 0
+    with open(path, "rb") as f:
+        data = f.read()
+    records = []
+    offset = 0
+    while offset < len(data):
+        end = data.find(b"\n", offset)
+        if end == -1:
+            break  # Torn final line
+        line = data[offset:end].strip()
+        if line:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                raise ValueError(f"Corrupt record in {path} at byte {offset}")
+        offset = end + 1
+    return records, offset
+
+
+def read_answers(filename: str) -> List[Dict]:
+    """
+    Return the saved answers: those in the JSON file followed by those in its journal.
+
+    Journal records are numbered; records whose number is already covered by the JSON file
+    (left over when a compaction was interrupted) are skipped.
+
+    :param filename: The saved-answers file ({"answers": [...]}).
+    """
+    answers = []
+    if os.path.exists(filename):
+        with open(filename, "r") as f:
+            answers = json.load(f).get("answers", [])
+    records, _ = _read_journal(journal_path(filename))
+    for record in records:
+        if record["seq"] >= len(answers):
+            answers.append({key: record[key] for key in ("antecedent", "question", "answer")})
+    return answers
+
+
+def write_answers(filename: str, answers: List[Dict]):
+    """
+    Write answers in the saved-answers format, atomically: the file is written next to its
+    destination, synced to disk and renamed over it, so it is never left half-written.
+
+    :param filename: The saved-answers file.
+    :param answers: The answers, as dicts with antecedent, question and answer.
+    """
+    temporary = filename + ".tmp"
+    with open(temporary, "w") as f:
+        json.dump({"answers": answers}, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, filename)
+    try:
+        directory = os.open(os.path.dirname(os.path.abspath(filename)), os.O_RDONLY)
+    except OSError:
+        return  # Directories cannot be opened on every platform
+    try:
+        os.fsync(directory)
+    finally:
+        os.close(directory)
+
+
+class AnswerJournal:
+    def __init__(self, filename: str, resume: bool = True):
+        """
+        Append-only journal of expert answers next to a saved-answers file.
+
+        Every answer is one JSON line with a sequence number, flushed and fsync'd before
+        `append` returns, so saving costs O(1) per answer and a crash loses at most the
+        answer being written. `compact` folds the journal into the JSON file with an atomic
+        rename. `read_answers` gives the answers of both.
+
+        :param filename: The saved-answers file ({"answers": [...]}).
+        :param resume: Continue after the saved answers. If False, the saved answers are
+            replaced by an empty list and the journal starts over, but only when the first
+            answer is appended, so quitting before that keeps the previous session.
+        """
+        self.filename = filename
+        self.path = journal_path(filename)
+        self._file = None
+        if resume:
+            self.n_answers = len(read_answers(filename))
+            # Drop a torn final line so new records start on a line of their own
+            _, intact = _read_journal(self.path)
+            if os.path.exists(self.path) and os.path.getsize(self.path) != intact:
+                with open(self.path, "r+b") as f:
+                    f.truncate(intact)
+            self._file = open(self.path, "a")
+        else:
+            self.n_answers = 0
+
+    def _start_over(self):
+        """Replace the saved answers by an empty list and remove the journal."""
+        write_answers(self.filename, [])
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self._file = open(self.path, "a")
+
+    def append(self, query: Query):
+        """
+        Durably record an answered query.
+
+        :param query: The query, with its answer set.
+        """
+        if self._file is None:
+            self._start_over()
+        record = {
+            "seq": self.n_answers,
+            "antecedent": sorted(query.antecedent),
+            "question": query.question,
+            "answer": query.answer,
+        }
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.n_answers += 1
+
+    def compact(self):
+        """Rewrite the JSON file with all answers and empty the journal."""
+        if self._file is None:
+            return  # Starting over, and nothing was appended yet
+        write_answers(self.filename, read_answers(self.filename))
+        # A crash here is harmless: the journal's records are now covered by the JSON file
+        self._file.close()
+        self._file = open(self.path, "w")
+
+    def close(self):
+        """Close the journal file."""
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,13 +1,15 @@
 import random
 import itertools
-from typing import List, Dict
+from math import comb
+from typing import Iterator, List, Dict, Optional
 from model.query import Query
 
 def generate_queries_by_block(
     all_item_ids: List[str],
     max_block_size: int = 4,
     max_queries_per_block: Dict[int, int] = {1: None, 2: None, 3: None, 4: None},
-    verbose = False
+    verbose = False,
+    seed: Optional[int] = None
 ) -> List[Query]:
     queries = []
     
@@ -16,6 +18,16 @@ def generate_queries_by_block(
         if max_queries_per_block[block_size] == 0:
             print(f"Block {block_size} queries: 0")
             continue
+
+        # With a limit, sample the block lazily instead of building all of it
+        if max_queries_per_block.get(block_size) is not None:
+            block_queries = list(sample_queries(all_item_ids, block_size, max_queries_per_block[block_size], seed))
+            queries.extend(block_queries)
+            if verbose:
+                print(f"Block {block_size} queries: {len(block_queries)}")
+                block_count.update({block_size: len(block_queries)})
+            continue
+
         possible_antecedents = list(itertools.combinations(all_item_ids, block_size))
         block_queries = []
 
@@ -31,13 +43,8 @@ def generate_queries_by_block(
                 query = Query(antecedent=list(antecedent), question=question)
                 block_queries.append(query)
 
-        # If limiting queries per block, sample *after* generating all
-        if max_queries_per_block.get(block_size) is not None:
-            block_queries = random.sample(
-                block_queries, min(max_queries_per_block[block_size], len(block_queries))
-            )
-
-        random.shuffle(block_queries)
+        rng = random.Random(seed) if seed is not None else random
+        rng.shuffle(block_queries)
         queries.extend(block_queries)
         
         if verbose:
@@ -45,3 +52,102 @@ def generate_queries_by_block(
             block_count.update({block_size: len(block_queries)})
 
     return queries, block_count
+
+
+def block_size_total(n_items: int, block_size: int) -> int:
+    """Number of queries in a block: antecedents of `block_size` items times the remaining questions."""
+    if block_size >= n_items:
+        return 0
+    return comb(n_items, block_size) * (n_items - block_size)
+
+
+def unrank_query(items: List[str], block_size: int, rank: int) -> Query:
+    """
+    Return the query with the given rank in a block, without generating the block.
+
+    Ranks enumerate the antecedents in `itertools.combinations(items, block_size)` order
+    and, within an antecedent, the remaining items in list order as questions.
+
+    :param items: The items, in a fixed order.
+    :param block_size: Number of items in the antecedent.
+    :param rank: 0 <= rank < block_size_total(len(items), block_size).
+    """
+    n_items = len(items)
+    antecedent_rank, question_rank = divmod(rank, n_items - block_size)
+
+    # Unrank the combination (combinatorial number system, lexicographic order)
+    antecedent = []
+    position = 0
+    for remaining in range(block_size, 0, -1):
+        while True:
+            count = comb(n_items - position - 1, remaining - 1)
+            if antecedent_rank < count:
+                break
+            antecedent_rank -= count
+            position += 1
+        antecedent.append(position)
+        position += 1
+
+    chosen = set(antecedent)
+    questions = (i for i in range(n_items) if i not in chosen)
+    question = next(itertools.islice(questions, question_rank, None))
+    return Query(antecedent=[items[i] for i in antecedent], question=items[question])
+
+
+def random_permutation(total: int, rng=random) -> Iterator[int]:
+    """
+    Lazily yield the numbers 0..total-1 in a pseudo-random order, in constant memory.
+
+    The order is a keyed 4-round Feistel network on the smallest even number of bits
+    that covers `total`, restricted to range(total) by cycle walking: an output outside
+    the range is encrypted again until it falls inside. The network is a bijection, so
+    every number comes out exactly once, and its domain is less than 4 * total, so a
+    number takes fewer than 4 encryptions on average.
+
+    :param total: Size of the range.
+    :param rng: Random generator the round keys are drawn from.
+    """
+    half_bits = max(1, ((total - 1).bit_length() + 1) // 2)
+    half_mask = (1 << half_bits) - 1
+    keys = [rng.getrandbits(64) for _ in range(4)]
+
+    def encrypt(value: int) -> int:
+        left, right = value >> half_bits, value & half_mask
+        for key in keys:
+            # Round function: the SplitMix64 finaliser of the keyed right half
+            mixed = ((right ^ key) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+            mixed = ((mixed ^ (mixed >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+            left, right = right, left ^ ((mixed ^ (mixed >> 31)) & half_mask)
+        return left << half_bits | right
+
+    for value in range(total):
+        value = encrypt(value)
+        while value >= total:
+            value = encrypt(value)
+        yield value
+
+
+def sample_queries(
+    all_item_ids: List[str],
+    block_size: int,
+    n_queries: Optional[int] = None,
+    seed: Optional[int] = None
+) -> Iterator[Query]:
+    """
+    Lazily yield distinct queries of one block in random order.
+
+    The ranks of the block are walked in the order of a seeded `random_permutation` and
+    unranked, so neither the block nor the ranks already drawn are kept in memory.
+
+    :param all_item_ids: All item IDs.
+    :param block_size: Number of items in the antecedent.
+    :param n_queries: Number of queries to yield (default: the whole block).
+    :param seed: Seed for a private random generator; the `random` module is used if None.
+    """
+    items = sorted(all_item_ids)
+    total = block_size_total(len(items), block_size)
+    n_queries = total if n_queries is None else min(n_queries, total)
+    rng = random.Random(seed) if seed is not None else random
+
+    for rank in itertools.islice(random_permutation(total, rng), n_queries):
+        yield unrank_query(items, block_size, rank)
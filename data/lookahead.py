@@ -0,0 +1,103 @@
+import multiprocessing
+import os
+from typing import Iterable, List, Optional, Tuple
+from model.query import Query
+from model.learning_space import LearningSpace
+
+# Learning space rebuilt from the snapshot in each worker process
+_worker_space: Optional[LearningSpace] = None
+_worker_max_derived: Optional[int] = None
+
+
+def _init_worker(snapshot: Tuple, max_derived: Optional[int]):
+    global _worker_space, _worker_max_derived
+    _worker_space = LearningSpace.from_snapshot(snapshot)
+    _worker_max_derived = max_derived
+
+
+def _evaluate_batch(batch: List[Tuple[Tuple[str, ...], str]]) -> List[Tuple[int, int]]:
+    return _evaluate(_worker_space, batch, _worker_max_derived)
+
+
+def _evaluate(learning_space: LearningSpace, batch: List[Tuple[Tuple[str, ...], str]],
+              max_derived: Optional[int]) -> List[Tuple[int, int]]:
+    yields = []
+    for antecedent, question in batch:
+        query = Query(antecedent, question)
+        yields.append((learning_space.evaluate_answer(query, 1, max_derived),
+                       learning_space.evaluate_answer(query, 0, max_derived)))
+    return yields
+
+
+class LookaheadEvaluator:
+    def __init__(self, learning_space: LearningSpace, processes: Optional[int] = None, batch_size: int = 64,
+                 max_derived: Optional[int] = 1000):
+        """
+        Evaluate what a yes and a no answer to candidate queries would derive, in a pool of
+        worker processes.
+
+        The workers receive a snapshot of the learning space (`LearningSpace.snapshot`) once,
+        through the pool initializer, and answer batches of candidates with
+        `LearningSpace.evaluate_answer`. When answers have changed the learning space, the
+        pool is restarted with a fresh snapshot before the next evaluation.
+
+        :param learning_space: The learning space to evaluate against.
+        :param processes: Number of worker processes (default: the number of CPUs). With 0
+            or 1 the candidates are evaluated in this process.
+        :param batch_size: Number of candidates sent to a worker at a time.
+        :param max_derived: Stop evaluating an answer once it derives this many queries (see
+            `LearningSpace.evaluate_answer`). With materialised inferences a single yes can
+            derive tens of thousands of facts; beyond the cap candidates count as equal.
+        """
+        self.learning_space = learning_space
+        self.processes = processes if processes is not None else (os.cpu_count() or 1)
+        self.batch_size = batch_size
+        self.max_derived = max_derived
+        self._pool = None
+        self._pool_version = None
+
+    def _version(self) -> Tuple[int, int, int]:
+        ls = self.learning_space
+        ls._sync_lookups()
+        return (len(ls._yes_lookup), len(ls._no_lookup), ls.surmise_function.version)
+
+    def _ensure_pool(self):
+        version = self._version()
+        if self._pool is not None and self._pool_version == version:
+            return
+        self.close()
+        self._pool = multiprocessing.Pool(self.processes, initializer=_init_worker,
+                                          initargs=(self.learning_space.snapshot(), self.max_derived))
+        self._pool_version = version
+
+    def evaluate(self, queries: Iterable[Query]) -> List[Tuple[int, int]]:
+        """
+        Return, per query, the number of queries a yes and a no answer would derive.
+
+        :param queries: The candidate queries.
+        :return: A list of (yes yield, no yield) in the order of `queries`.
+        """
+        candidates = [(tuple(query.antecedent), query.question) for query in queries]
+        if self.processes <= 1:
+            return _evaluate(self.learning_space, candidates, self.max_derived)
+
+        self._ensure_pool()
+        batches = [candidates[start:start + self.batch_size] for start in range(0, len(candidates), self.batch_size)]
+        yields = []
+        for batch_yields in self._pool.map(_evaluate_batch, batches):
+            yields.extend(batch_yields)
+        return yields
+
+    def close(self):
+        """Shut down the worker processes."""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+            self._pool_version = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,33 +1,118 @@
+from collections import OrderedDict, deque
 from typing import Dict, List, Optional
 from model.query import Query
 from model.learning_space import LearningSpace
+from data.generate_queries import sample_queries
+from data.query_scheduler import InformationGainScheduler
+from data.lookahead import LookaheadEvaluator
+from data.answer_journal import journal_path, read_answers
+from data.state_snapshot import answers_fingerprint, load_snapshot, write_snapshot
+import itertools
 import json
 import os
+import random
 
 class QueryManager:
-    def __init__(self, learning_space: LearningSpace, queries: Optional[List[Query]] = None, block_count: Dict[int, int] = {1: 0, 2: 0, 3: 0, 4: 0}):
+    def __init__(self, learning_space: LearningSpace, queries: Optional[List[Query]] = None, block_count: Dict[int, int] = {1: 0, 2: 0, 3: 0, 4: 0},
+                 blocks: Optional[Dict[int, Optional[int]]] = None, seed: Optional[int] = None, strategy: str = "first",
+                 lookahead_candidates: Optional[int] = 32):
+        """
+        :param learning_space: The learning space the answers are applied to.
+        :param queries: Queries generated up front.
+        :param block_count: Number of queries per block in `queries`.
+        :param blocks: Blocks to generate lazily, as block size -> maximum number of queries
+            (None for the whole block). They are opened in order of size when the active
+            queries run out, see `open_block`.
+        :param seed: Seed for the order of lazily generated queries and random choices.
+        :param strategy: How the next query is chosen: "first" (the oldest active query),
+            "random", or "information_gain" (the query whose answer decides the most other
+            active queries, see `InformationGainScheduler`) or "lookahead" (the query whose
+            yes and no answers derive the most queries, evaluated in worker processes by
+            `LookaheadEvaluator`).
+        :param lookahead_candidates: With "lookahead", only evaluate this many active
+            queries, those that score best with `InformationGainScheduler`. All of them if None,
+            which takes minutes per choice on real data.
+        """
         self.learning_space = learning_space  # Reference to the learning space for query filtering
         self.all_queries: List[Query] = queries.copy() if queries else []
-        self.block_count = block_count
-        self.active_queries: List[Query] = queries.copy() if queries else []
+        self.block_count = dict(block_count)
+        # Insertion-ordered pools (values unused), so membership and removal are O(1)
+        self.active_queries: "OrderedDict[Query, None]" = OrderedDict.fromkeys(queries or [])
         self.answered_queries: List[Query] = []
-        self.deactivated_queries: List[Query] = []
+        self.deactivated_queries: "OrderedDict[Query, None]" = OrderedDict()
+        self.pending_blocks = deque(sorted((size, limit) for size, limit in (blocks or {}).items() if limit != 0))
+        self.rng = random.Random(seed) if seed is not None else random
+
+        # Inference reports the queries it decides, so only those leave the pool
+        self.learning_space.subscribe(self._on_queries_decided)
+
+        if strategy not in ("first", "random", "information_gain", "lookahead"):
+            raise ValueError(f"Unknown strategy: {strategy}")
+        self.strategy = strategy
+        self.scheduler: Optional[InformationGainScheduler] = None
+        if strategy in ("information_gain", "lookahead"):
+            self.scheduler = InformationGainScheduler(learning_space, self.active_queries)
+            self.scheduler.add(self.active_queries)
+        self.evaluator: Optional[LookaheadEvaluator] = None
+        self.lookahead_candidates = lookahead_candidates
+        if strategy == "lookahead":
+            self.evaluator = LookaheadEvaluator(learning_space)
+
+    def close(self):
+        """Stop following the learning space."""
+        self.learning_space.unsubscribe(self._on_queries_decided)
+        if self.scheduler is not None:
+            self.scheduler.close()
+        if self.evaluator is not None:
+            self.evaluator.close()
+
+    def _on_queries_decided(self, queries: List[Query]):
+        self.deactivate_queries(queries)
 
     def get_next_query(self, random=False) -> Optional[Query]:
-        """Consult the learning space to decide the next query to ask."""
-        if not self.active_queries:
-            return None
+        """
+        Consult the learning space to decide the next query to ask.
 
-        # Check which queries are still needed based on the learning space
-        self.filter_queries_based_on_learning_space()
+        Queries decided by inference have already left the pool, so only the candidate
+        picked by the strategy is checked (for entailment when inferences are not
+        materialised).
 
-        if not self.active_queries:  # If no queries left after filtering
-            return None
+        :param random: Pick a random active query, whatever the strategy.
+        """
+        use_random = random or self.strategy == "random"
+        while True:
+            # Drop decided queries until an open one is found
+            while self.active_queries:
+                if use_random:
+                    query = self.rng.choice(list(self.active_queries))
+                elif self.evaluator is not None:
+                    query = self._best_lookahead_query()
+                elif self.scheduler is not None:
+                    query = self.scheduler.next_query()
+                else:
+                    query = next(iter(self.active_queries))
+                if not self.query_inferable_in_learning_space(query):
+                    break
+                self.deactivate_queries([query])
+            if self.active_queries:
+                break
+            if not self.pending_blocks:  # If no queries left after filtering
+                return None
+            self.open_block(*self.pending_blocks.popleft())
         
         print(f"Active queries: {len(self.active_queries)}")
-        if random:
-            return random.choice(self.active_queries)
-        return self.active_queries[0]
+        return query
+
+    def _best_lookahead_query(self) -> Query:
+        """
+        The candidate whose yes and no answers derive the most queries together. Candidates
+        are the best by information gain, which also breaks ties.
+        """
+        n_candidates = self.lookahead_candidates if self.lookahead_candidates is not None else len(self.active_queries)
+        candidates = self.scheduler.top_queries(n_candidates)
+        yields = self.evaluator.evaluate(candidates)
+        best = max(range(len(candidates)), key=lambda i: (sum(yields[i]), -i))
+        return candidates[best]
 
     def filter_queries_based_on_learning_space(self):
         """Filter out queries that are already covered by current knowledge state."""
@@ -47,8 +132,66 @@ class QueryManager:
         # If the query is already answered or inferred through inferences, return True
         if query in self.learning_space.P_yes or query in self.learning_space.P_no or query in self.learning_space.inferred_no or query in self.learning_space.inferred_yes:
             return True
+        # Without materialised inferences, ask the learning space whether the answers entail it
+        if not self.learning_space.materialize_inferences:
+            return self.learning_space.entails(query.antecedent, query.question) is not None
         return False
 
+    def open_block(self, block_size: int, max_queries: Optional[int] = None) -> int:
+        """
+        Generate the queries of a block and add those not yet decided to the active queries.
+
+        The questions an antecedent decides come from a single closure per antecedent
+        (`LearningSpace.entailed_questions`), shared by all queries with that antecedent; the
+        block is still generated query by query and each query is checked against it. Queries
+        already asked (answered, pending or unsure) are skipped too. Without a limit the block
+        is enumerated and shuffled; with a limit, queries are sampled lazily (`sample_queries`)
+        until `max_queries` undecided ones are found.
+
+        :param block_size: Number of items in the antecedent.
+        :param max_queries: Maximum number of queries to add (None for the whole block).
+        :return: The number of queries added.
+        """
+        items = sorted(self.learning_space.items)
+        decided_by_antecedent = {}
+        # Queries hash on (antecedent, question), so these match regardless of the answer
+        asked = set(self.answered_queries)
+
+        def undecided(query: Query) -> bool:
+            decided = decided_by_antecedent.get(query.antecedent)
+            if decided is None:
+                decided = self.learning_space.entailed_questions(query.antecedent)
+                decided_by_antecedent[query.antecedent] = decided
+            return (query.question not in decided
+                    and query not in asked
+                    and query not in self.deactivated_queries
+                    and query not in self.learning_space.inferred_yes
+                    and query not in self.learning_space.inferred_no)
+
+        block_queries = []
+        if max_queries is None:
+            for antecedent in itertools.combinations(items, block_size):
+                for question in items:
+                    if question not in antecedent:
+                        query = Query(antecedent=list(antecedent), question=question)
+                        if undecided(query):
+                            block_queries.append(query)
+            self.rng.shuffle(block_queries)
+        else:
+            for query in sample_queries(items, block_size, seed=self.rng.getrandbits(64)):
+                if len(block_queries) >= max_queries:
+                    break
+                if undecided(query):
+                    block_queries.append(query)
+
+        self.all_queries.extend(block_queries)
+        self.active_queries.update(OrderedDict.fromkeys(block_queries))
+        if self.scheduler is not None:
+            self.scheduler.add(block_queries)
+        self.block_count[block_size] = self.block_count.get(block_size, 0) + len(block_queries)
+        print(f"Block {block_size} queries: {len(block_queries)}")
+        return len(block_queries)
+
     def record_answer(self, query: Query, answer: int):
         """Record the answer and update the learning space accordingly."""
         query.answer = answer
@@ -60,9 +203,9 @@ class QueryManager:
         """Deactivate queries that are no longer necessary."""
         for query in queries_to_deactivate:
             if query in self.active_queries and (not (query in self.deactivated_queries)):
-                self.active_queries.remove(query)
+                del self.active_queries[query]
                 self.block_count.update({query.antecedent_size(): self.block_count.get(query.antecedent_size())-1})
-                self.deactivated_queries.append(query)
+                self.deactivated_queries[query] = None
 
     def save_state(self, filename):
         # Collect answered queries and answers into a list of dicts
@@ -77,26 +220,42 @@ class QueryManager:
             json.dump({"answers": answers_list}, f, indent=2)
         print(f"Saved {len(answers_list)} answers to {filename}")
 
-    def load_state(self, filename):
-        if not os.path.exists(filename):
+    def load_state(self, filename, snapshot: Optional[str] = None):
+        """
+        Replay the saved answers of `filename`, including those in its journal (see `AnswerJournal`).
+
+        :param filename: The saved-answers file.
+        :param snapshot: Snapshot file of the derived state (see `data.state_snapshot`). If it
+            was built from the same answers it is loaded instead of replaying them; otherwise
+            the answers are replayed and the snapshot is rebuilt.
+        """
+        if not os.path.exists(filename) and not os.path.exists(journal_path(filename)):
             print(f"No saved state file found at {filename}")
             return
 
         try:
-            with open(filename, "r") as f:
-                data = json.load(f)
+            answers = read_answers(filename)
+            fingerprint = answers_fingerprint(answers) if snapshot else None
+            restored = bool(snapshot) and load_snapshot(self.learning_space, snapshot, fingerprint)
 
-            for entry in data.get("answers", []):
+            for entry in answers:
                 antecedent = entry["antecedent"]
                 question = entry["question"]
                 answer = entry["answer"]
                 
                 # Create a Query object with loaded data
                 query = Query(antecedent, question, answer)
-                # Record the loaded answer
-                self.record_answer(query, answer)
+                if restored:
+                    # The learning space already holds the effect of the answer
+                    self.answered_queries.append(query)
+                    self.deactivate_queries([query])
+                else:
+                    # Record the loaded answer
+                    self.record_answer(query, answer)
+            if snapshot and not restored:
+                write_snapshot(self.learning_space, snapshot, fingerprint)
 
-            print(f"Loaded {len(data.get('answers', []))} answers from {filename}")
+            print(f"Loaded {len(answers)} answers from {filename}")
         except Exception as inst:
             print(inst)  
             
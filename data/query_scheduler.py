@@ -0,0 +1,187 @@
+import heapq
+from collections import defaultdict
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+from model.query import Query
+from model.learning_space import LearningSpace
+
+
+class InformationGainScheduler:
+    def __init__(self, learning_space: LearningSpace, active_queries: Mapping[Query, None]):
+        """
+        Serve the active query whose answer decides the most other active queries.
+
+        A candidate A→q is scored by the active queries that one round of the inference
+        rules [IR1]-[IR3] would derive from it together with the known facts: for a yes
+        answer the joins of A→q with P_yes and P_no, for a no answer the join of A→¬q
+        with P_yes. The score is the sum of both counts.
+
+        Scores live in a lazy max-heap. A new fact can only raise the scores of candidates
+        that share an item with it, so those are looked up in candidate indexes and
+        rescored before the next choice. Deactivated queries only lower scores, so the
+        top entry is rescored when it is taken and pushed back if it no longer leads.
+
+        :param learning_space: The learning space the answers are applied to.
+        :param active_queries: The pool of active queries (kept up to date by the caller).
+        """
+        self.learning_space = learning_space
+        self.active_queries = active_queries
+        self._heap: List[Tuple[int, int, int, Query]] = []  # (-score, order added, entry number, query)
+        self._scores: Dict[Query, int] = {}
+        self._orders: Dict[Query, int] = {}
+        self._entries = 0
+        self._dirty: Set[Query] = set()
+        # What new facts touched since the last choice: questions, antecedent items, antecedent masks
+        self._dirty_questions: Set[str] = set()
+        self._dirty_items: Set[str] = set()
+        self._dirty_antecedents: Set[int] = set()
+
+        # Candidate indexes: by (antecedent mask, question), by question, by antecedent item and by antecedent mask
+        self._by_key: Dict[Tuple[int, str], Query] = {}
+        self._by_question: Dict[str, List[Query]] = defaultdict(list)
+        self._by_item: Dict[str, List[Query]] = defaultdict(list)
+        self._by_antecedent: Dict[int, List[Query]] = defaultdict(list)
+
+        learning_space.subscribe(self._on_queries_decided)
+
+    def close(self):
+        """Stop following the learning space."""
+        self.learning_space.unsubscribe(self._on_queries_decided)
+
+    def add(self, queries: Iterable[Query]):
+        """
+        Register candidate queries and score them. The new queries can also be decided by
+        the candidates already registered, so those are rescored before the next choice.
+
+        :param queries: Queries that were added to the active pool.
+        """
+        index = self.learning_space.item_index
+        self._dirty.update(query for query in self._scores if query in self.active_queries)
+        added = []
+        for query in queries:
+            key = (index.encode(query.antecedent), query.question)
+            if key in self._by_key:
+                continue
+            self._by_key[key] = query
+            self._by_question[query.question].append(query)
+            for item in query.antecedent:
+                self._by_item[item].append(query)
+            self._by_antecedent[key[0]].append(query)
+            added.append(query)
+        for query in added:
+            self._push(query, self.score(query))
+
+    def _push(self, query: Query, score: int):
+        self._scores[query] = score
+        order = self._orders.setdefault(query, len(self._orders))
+        heapq.heappush(self._heap, (-score, order, self._entries, query))
+        self._entries += 1
+
+    def _is_active(self, key: Tuple[int, str]) -> bool:
+        query = self._by_key.get(key)
+        return query is not None and query in self.active_queries
+
+    def score(self, query: Query) -> int:
+        """
+        Count the active queries a yes plus those a no answer to `query` would decide
+        in one round of inference.
+
+        :param query: A candidate query.
+        """
+        ls = self.learning_space
+        index = ls.item_index
+        A = index.encode(query.antecedent)
+        q = query.question
+        q_bit = index.bit(q)
+        decided = set()
+
+        # Yes: A→q joined with P_yes ([IR1], [IR2], both ways round) and P_no ([IR3])
+        for _, r in ls._yes_by_item.get(q, ()):
+            decided.add((A | q_bit, r))
+            decided.add((A, r))
+        for s in index.iter_items(A):
+            s_bit = index.bit(s)
+            for C, _ in ls._yes_by_question.get(s, ()):
+                decided.add((C | s_bit, q))
+                decided.add((C, q))
+            for B in (A & ~s_bit, A):
+                if (B, s) in ls._no_lookup:
+                    decided.add((B, q))
+
+        # No: A→¬q joined with P_yes ([IR3])
+        for _, p in ls._yes_by_antecedent.get(A | q_bit, ()):
+            decided.add((A, p))
+
+        decided.discard((A, q))
+        return sum(1 for key in decided if self._is_active(key))
+
+    def _on_queries_decided(self, queries: List[Query]):
+        """
+        Note what the new facts touch; the candidates whose score they may raise are
+        looked up once, at the next choice.
+        """
+        index = self.learning_space.item_index
+        for query in queries:
+            B = index.encode(query.antecedent)
+            if query.answer == 1:
+                self._dirty_questions.update(query.antecedent)
+                self._dirty_items.add(query.question)
+                for item in query.antecedent:
+                    candidate = self._by_key.get((B & ~index.bit(item), item))
+                    if candidate is not None:
+                        self._dirty.add(candidate)
+            else:
+                self._dirty_antecedents.add(B | index.bit(query.question))
+                self._dirty_antecedents.add(B)
+
+    def _collect_dirty(self) -> Set[Query]:
+        dirty = self._dirty
+        for question in self._dirty_questions:
+            dirty.update(self._by_question.get(question, ()))
+        for item in self._dirty_items:
+            dirty.update(self._by_item.get(item, ()))
+        for antecedent in self._dirty_antecedents:
+            dirty.update(self._by_antecedent.get(antecedent, ()))
+        self._dirty = set()
+        self._dirty_questions = set()
+        self._dirty_items = set()
+        self._dirty_antecedents = set()
+        return dirty
+
+    def next_query(self) -> Optional[Query]:
+        """Return the active query with the highest score (earliest added on ties), or None."""
+        best = self.top_queries(1)
+        return best[0] if best else None
+
+    def top_queries(self, n: int) -> List[Query]:
+        """
+        Return the `n` active queries with the highest scores, best first (earliest added
+        on ties). The queries stay candidates.
+
+        :param n: Number of queries to return.
+        """
+        for query in self._collect_dirty():
+            if query in self.active_queries:
+                score = self.score(query)
+                if score != self._scores.get(query):
+                    self._push(query, score)
+
+        heap = self._heap
+        chosen: List[Query] = []
+        seen: Set[Query] = set()
+        while heap and len(chosen) < n:
+            neg_score, order, _, query = heapq.heappop(heap)
+            if query not in self.active_queries:
+                self._scores.pop(query, None)
+                continue
+            if self._scores.get(query) != -neg_score or query in seen:
+                continue  # Superseded by a newer entry
+            score = self.score(query)
+            if score != -neg_score:
+                # Fell behind since it was scored: the new entry waits its turn
+                self._push(query, score)
+                continue
+            chosen.append(query)
+            seen.add(query)
+        for query in chosen:
+            self._push(query, self._scores[query])
+        return chosen
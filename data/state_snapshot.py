@@ -0,0 +1,190 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+from typing import Dict, List, Optional, Tuple
+from model.query import Query
+from model.learning_space import LearningSpace
+
+MAGIC = b"LSPACE\x00\x01"
+VERSION = 1
+
+# magic, format version, minimal surmise function, materialised inferences, answers fingerprint,
+# number of items / positive facts / negative facts / pending queries / clauses,
+# queries answered, bytes per mask
+_HEADER = struct.Struct("<8sH??32sIIIIIII")
+_LENGTH = struct.Struct("<H")
+_FACT_TAIL = struct.Struct("<I?")     # question, inferred
+_PENDING_TAIL = struct.Struct("<Ib")  # question, answer
+_ITEM = struct.Struct("<I")
+
+
+def snapshot_path(filename: str) -> str:
+    """Return the snapshot file that belongs to a saved-answers file (answers.json -> answers.snapshot)."""
+    return os.path.splitext(filename)[0] + ".snapshot"
+
+
+def answers_fingerprint(answers: List[Dict]) -> bytes:
+    """
+    SHA-256 of the answers in a canonical JSON form. Unlike `SurmiseFunction.fingerprint`
+    it does not depend on the process (string hashes are randomised per run).
+
+    :param answers: The answers, as read by `read_answers`.
+    """
+    canonical = [[sorted(entry["antecedent"]), entry["question"], entry["answer"]] for entry in answers]
+    return hashlib.sha256(json.dumps(canonical, separators=(",", ":")).encode("utf-8")).digest()
+
+
+def write_snapshot(learning_space: LearningSpace, path: str, fingerprint: bytes):
+    """
+    Store the state derived from the answers: P_yes / P_no with their inferred flags, the
+    pending table and the clauses of the surmise function. Items are stored once in a
+    table; item sets are bitmasks of fixed width, so every record has a fixed size. The
+    file is written next to `path` and renamed over it.
+
+    :param learning_space: The learning space to store.
+    :param path: The snapshot file.
+    :param fingerprint: `answers_fingerprint` of the answers the state was built from.
+    """
+    ls = learning_space
+    ls._sync_lookups()
+    index = ls.item_index
+    items = list(index.items)
+    mask_bytes = max(1, (len(items) + 7) // 8)
+    sf = ls.surmise_function
+    clauses = [(index.positions[item], mask) for item, masks in sf.clause_masks.items() for mask in masks]
+
+    parts = [_HEADER.pack(MAGIC, VERSION, sf.minimal, ls.materialize_inferences, fingerprint,
+                          len(items), len(ls._yes_lookup), len(ls._no_lookup), len(ls.pending_table),
+                          len(clauses), ls.queries_answered, mask_bytes)]
+    for item in items:
+        encoded = item.encode("utf-8")
+        parts.append(_LENGTH.pack(len(encoded)))
+        parts.append(encoded)
+    for lookup, inferred in ((ls._yes_lookup, ls.inferred_yes), (ls._no_lookup, ls.inferred_no)):
+        for (A, question), query in lookup.items():
+            parts.append(A.to_bytes(mask_bytes, "little"))
+            parts.append(_FACT_TAIL.pack(index.positions[question], query in inferred))
+    for query in ls.pending_table:
+        parts.append(index.encode(query.antecedent).to_bytes(mask_bytes, "little"))
+        parts.append(_PENDING_TAIL.pack(index.add(query.question), int(query.answer)))
+    for position, mask in clauses:
+        parts.append(_ITEM.pack(position))
+        parts.append(mask.to_bytes(mask_bytes, "little"))
+
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(b"".join(parts))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+def _decode(buffer, ls: LearningSpace, fingerprint: bytes) -> Optional[Tuple[List, List, List, int]]:
+    """
+    Decode a snapshot without touching the learning space. Return None if it does not
+    belong to these answers and items; raise struct.error, IndexError or ValueError if
+    the file is damaged.
+    """
+    (magic, version, minimal, materialize, stored_fingerprint, n_items, n_yes, n_no,
+     n_pending, n_clauses, queries_answered, mask_bytes) = _HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC or version != VERSION or stored_fingerprint != fingerprint:
+        return None
+    if minimal != ls.surmise_function.minimal or materialize != ls.materialize_inferences:
+        return None
+    if ls.P_yes or ls.P_no or ls.pending_table or ls.surmise_function.surmise:
+        return None
+
+    offset = _HEADER.size
+    items = []
+    for _ in range(n_items):
+        (length,) = _LENGTH.unpack_from(buffer, offset)
+        offset += _LENGTH.size
+        if offset + length > len(buffer):
+            raise ValueError("Item table runs past the end of the snapshot")
+        items.append(bytes(buffer[offset:offset + length]).decode("utf-8"))
+        offset += length
+    if items != ls.item_index.items:
+        return None
+    expected = (offset + (n_yes + n_no) * (mask_bytes + _FACT_TAIL.size)
+                + n_pending * (mask_bytes + _PENDING_TAIL.size) + n_clauses * (_ITEM.size + mask_bytes))
+    if len(buffer) != expected:
+        raise ValueError(f"Snapshot has {len(buffer)} bytes, its header implies {expected}")
+    full_mask = (1 << n_items) - 1
+
+    def read_mask(at):
+        mask = int.from_bytes(buffer[at:at + mask_bytes], "little")
+        if mask & ~full_mask:
+            raise ValueError("Mask with bits outside the item table")
+        return mask
+
+    facts = []
+    for answer, count in ((1, n_yes), (0, n_no)):
+        for _ in range(count):
+            A = read_mask(offset)
+            question, inferred = _FACT_TAIL.unpack_from(buffer, offset + mask_bytes)
+            offset += mask_bytes + _FACT_TAIL.size
+            facts.append((answer, A, items[question], inferred))
+    pending = []
+    for _ in range(n_pending):
+        A = read_mask(offset)
+        question, answer = _PENDING_TAIL.unpack_from(buffer, offset + mask_bytes)
+        offset += mask_bytes + _PENDING_TAIL.size
+        pending.append((A, items[question], answer))
+    clauses = []
+    for _ in range(n_clauses):
+        (position,) = _ITEM.unpack_from(buffer, offset)
+        offset += _ITEM.size
+        clauses.append((items[position], read_mask(offset)))
+        offset += mask_bytes
+    return facts, pending, clauses, queries_answered
+
+
+def load_snapshot(learning_space: LearningSpace, path: str, fingerprint: bytes) -> bool:
+    """
+    Restore a snapshot into a learning space that has no answers yet.
+
+    The file is memory-mapped and decoded in place with `struct.unpack_from`. Nothing is
+    loaded, and False is returned, if the file is missing, has another format version, was
+    built from other answers (`fingerprint`) or for other items, or is damaged (its size
+    does not match the counts in its header, or a record does not decode).
+
+    :param learning_space: An empty learning space with the items the snapshot was made for.
+    :param path: The snapshot file.
+    :param fingerprint: `answers_fingerprint` of the current answers.
+    :return: True if the snapshot was loaded.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) < _HEADER.size:
+        return False
+    ls = learning_space
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        try:
+            decoded = _decode(buffer, ls, fingerprint)
+        except (struct.error, IndexError, ValueError):
+            return False  # Damaged file: the caller replays the answers instead
+    if decoded is None:
+        return False
+    facts, pending, clauses, queries_answered = decoded
+    index = ls.item_index
+
+    for item, mask in clauses:
+        ls.surmise_function.add_clause(item, index.decode(mask))
+    for answer, A, question, inferred in facts:
+        query = index.query(A, question, answer)
+        key = (A, question)
+        if answer == 1:
+            ls._yes_lookup[key] = query
+            ls._index_yes(key)
+            ls.P_yes.add(query)
+            if inferred:
+                ls.inferred_yes.add(query)
+        else:
+            ls._no_lookup[key] = query
+            ls._index_no(key)
+            ls.P_no.add(query)
+            if inferred:
+                ls.inferred_no.add(query)
+    ls.pending_table = [Query(index.decode(A), question, answer) for A, question, answer in pending]
+    ls.queries_answered = queries_answered
+    return True
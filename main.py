@@ -6,13 +6,14 @@ import data.get_data as get_data
 import data.ask_experts_gui as ask_experts_gui
 
 from data.query_manager import QueryManager
-from data.generate_queries import generate_queries_by_block
+from data.answer_journal import AnswerJournal, read_answers
+from data.state_snapshot import answers_fingerprint, snapshot_path, write_snapshot
 
 from model.surmise_function import SurmiseFunction
 from model.learning_space import LearningSpace
 
-from utils.hasse import plot_hasse
-from utils.surmise_to_states import surmise_to_states
+from utils.hasse import plot_hasse, write_hasse
+from utils.surmise_to_states import surmise_to_states, iter_states
 
 
 def initialize_learning_space(data) -> LearningSpace:
@@ -29,27 +30,41 @@ def load_tasks(data):
     return tasks, task_dict
 
 
-def run_query_loop(qm: QueryManager, task_dict: dict, state_filename: str, verbose: bool):
+def run_query_loop(qm: QueryManager, task_dict: dict, journal: AnswerJournal, verbose: bool):
     """Main loop: present queries to expert via GUI and record answers."""
     while (query := qm.get_next_query()):
         if query.question in qm.learning_space.items:
             response = ask_experts_gui.run_gui(query.antecedent, query.question, task_dict)
             qm.record_answer(query, response)
-            qm.save_state(state_filename)
+            journal.append(query)  # One durable line per answer
             if verbose:
                 print(qm.learning_space)
             print('-' * 60)
         else:
             print(f"Skipping query {query.question} (not in learning space).")
+    journal.compact()
 
 
-def summarize_learning_space(surmise_function: SurmiseFunction, item_ids: list):
+def summarize_learning_space(surmise_function: SurmiseFunction, item_ids: list, states_filename: str = None, max_states: int = None, hasse_filename: str = None):
     """Summarize the learning space"""
     max_number_items_for_hasse = 20
     if len(item_ids) > max_number_items_for_hasse:
         display_dependencies(surmise_function, item_ids)
+        if states_filename:
+            save_states(surmise_function, states_filename, max_states)
     else:
-        display_hasse(surmise_function, item_ids)
+        display_hasse(surmise_function, item_ids, hasse_filename)
+
+
+def save_states(surmise_function: SurmiseFunction, filename: str, max_states: int = None):
+    """Stream knowledge states to a file, one sorted state per line, and report how many were written."""
+    n_states = 0
+    with open(filename, "w") as f:
+        for state in iter_states(surmise_function, limit=max_states):
+            f.write(" ".join(sorted(state)) + "\n")
+            n_states += 1
+    limited = " (limit reached)" if max_states is not None and n_states == max_states else ""
+    print(f"\nWrote {n_states} knowledge states to {filename}{limited}")
     
             
 def display_dependencies(surmise_function: SurmiseFunction, item_ids: list):
@@ -71,14 +86,19 @@ def display_dependencies(surmise_function: SurmiseFunction, item_ids: list):
         else:
             print("No dependencies")
             
-def display_hasse(surmise_function: SurmiseFunction, item_ids: list):
+def display_hasse(surmise_function: SurmiseFunction, item_ids: list, hasse_filename: str = None):
     """Print resulting knowledge states and Hasse diagram from surmise function."""
     knowledge_states = surmise_to_states(surmise_function)
     print("\nKnowledge States:")
     for state in knowledge_states:
         print(list(state))
-        
-    plot_hasse(knowledge_states)
+
+    if hasse_filename:
+        # Headless: write the diagram (DOT, SVG, ...) without opening a window
+        write_hasse(knowledge_states, hasse_filename)
+        print(f"\nWrote Hasse diagram to {hasse_filename}")
+    else:
+        plot_hasse(knowledge_states)
 
 
 def main( args ):
@@ -92,13 +112,18 @@ def main( args ):
     task_ids = learning_space.items
 
     # Step 3: Generate and manage queries
-    queries, block_count = generate_queries_by_block(task_ids, verbose=args.verbose, max_queries_per_block={1: 3000, 2: 0, 3: 0, 4: 0})
-    qm = QueryManager(learning_space, queries, block_count)
+    # Blocks are generated when they are reached, skipping queries the answers already decide
+    qm = QueryManager(learning_space, blocks={1: 3000}, strategy=args.strategy)
     if args.load_answers:
-        qm.load_state(args.answered_queries_filename)
+        # The derived state is restored from the snapshot when it matches the saved answers
+        qm.load_state(args.answered_queries_filename, snapshot=snapshot_path(args.answered_queries_filename))
 
-    # Step 4: Ask expert queries (GUI)
-    run_query_loop(qm, task_dict, args.answered_queries_filename, args.verbose)
+    # Step 4: Ask expert queries (GUI), journaling every answer
+    with AnswerJournal(args.answered_queries_filename, resume=args.load_answers) as journal:
+        run_query_loop(qm, task_dict, journal, args.verbose)
+    answers = read_answers(args.answered_queries_filename)
+    write_snapshot(learning_space, snapshot_path(args.answered_queries_filename), answers_fingerprint(answers))
+    qm.close()
 
     # Step 5: Finalize learning space
     print("\nFinal Learning Space:")
@@ -106,7 +131,7 @@ def main( args ):
     learning_space.run_second_stage()
 
     # Step 6: Output knowledge states and implications
-    summarize_learning_space(learning_space.surmise_function, task_ids)
+    summarize_learning_space(learning_space.surmise_function, task_ids, args.states_filename, args.max_states, args.hasse_filename)
 
 
 if __name__ == "__main__":
@@ -127,6 +152,22 @@ if __name__ == "__main__":
     parser.add_argument('-L', '--load',
             dest="load_answers",action="store_false",
             help="Quiet mode (opposite of verbose)")
+    parser.add_argument('-s', '--states',
+            dest="states_filename",
+            default=None,
+            help="File to stream knowledge states to when there are too many items for a Hasse diagram")
+    parser.add_argument('--max-states',
+            dest="max_states", type=int,
+            default=None,
+            help="Maximum number of knowledge states to write")
+    parser.add_argument('-d', '--diagram',
+            dest="hasse_filename",
+            default=None,
+            help="Write the Hasse diagram to this file (.dot, .svg, ...) instead of displaying it")
+    parser.add_argument('--strategy',
+            dest="strategy", choices=["first", "random", "information_gain", "lookahead"],
+            default="first",
+            help="How the next query is chosen")
     parser.add_argument('-q', '--quiet',
             dest="verbose",action="store_false",
             help="Quiet mode (opposite of verbose)")
@@ -2,29 +2,41 @@ from typing import Set
 
 
 class Clause:
+    __slots__ = ("prerequisites", "conclusion", "_hash")
+
     def __init__(self, prerequisites: Set[str], item: str):
         """
         Represents a clause, which is a set of prerequisites for mastering an item.
         The item is always included in the prerequisites set.
+        Clauses are immutable; `ItemIndex.clause` returns one shared object per clause.
         
         :param prerequisites: A set of items that must be mastered before the current item.
         :param item: The item for which the clause is defined (this item must be included in the prerequisites).
         """
         # Ensure that the item is always part of the prerequisites
-        self.prerequisites = frozenset(prerequisites) | {item}  # Union with item itself
+        prerequisites = prerequisites if isinstance(prerequisites, frozenset) else frozenset(prerequisites)
+        self.prerequisites = prerequisites if item in prerequisites else prerequisites | {item}  # Union with item itself
         self.conclusion = item  # The item is the conclusion of this clause
+        self._hash = hash((self.prerequisites, item))
         
     def is_satisfied_by(self, knowledge_state: Set[str]) -> bool:
-        # A clause is satisfied if all prerequisites and the item are in the state
-        return self.prerequisites.union({self.conclusion}).issubset(knowledge_state)
+        # A clause is satisfied if all prerequisites (which include the item) are in the state
+        return self.prerequisites.issubset(knowledge_state)
 
     def __repr__(self):
         return f"Clause({sorted(self.prerequisites)} ⊢ {self.conclusion})"
 
     def __eq__(self, other):
-        return isinstance(other, Clause) and self.prerequisites == other.prerequisites and self.conclusion == other.conclusion
+        if self is other:
+            return True
+        return (isinstance(other, Clause) and self._hash == other._hash
+                and self.conclusion == other.conclusion and self.prerequisites == other.prerequisites)
 
     def __hash__(self):
-        return hash((self.prerequisites, self.conclusion))
+        return self._hash
 
+    def __getstate__(self):
+        return self.prerequisites, self.conclusion
 
+    def __setstate__(self, state):
+        self.__init__(*state)
@@ -0,0 +1,149 @@
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+from model.surmise_function import SurmiseFunction
+from model.compiled_surmise import domain_index
+
+
+class ClosureOperator:
+    def __init__(self, surmise_function: SurmiseFunction, items: Optional[Iterable[str]] = None):
+        """
+        Compile a surmise function into clause tables for the closure operator of its
+        knowledge states, the states `surmise_to_states` enumerates: those reachable from
+        the empty state by adding one item at a time, each with a clause inside the state.
+
+        A union of such states is again one, so every set of items contains a largest
+        state, its interior: what a student who solved the set has certainly mastered.
+        Dually, every set of failed items lies in a smallest set whose complement is a
+        state: its closure, the items a student who failed the set fails as well.
+
+        The interior is grown by counter-based forward chaining from the empty state:
+        every clause counts its prerequisites (other than its own item) that are not in
+        the state yet, and its item is added once a count reaches zero. Every clause is
+        counted down at most once per prerequisite, so a call takes time linear in the
+        total size of the clauses.
+
+        Bits are assigned as in `CompiledSurmise` (reverse sorted item order), so masks can be
+        passed between the two for the same items.
+
+        :param surmise_function: The surmise function to compile.
+        :param items: The item domain. Defaults to every item mentioned in the surmise function.
+        """
+        self.items, self.index = domain_index(surmise_function, items)
+        self.full_mask = self.index.full_mask
+        n_items = len(self.items)
+
+        # Clause tables: the item each clause is for, the number of its other prerequisites,
+        # and per item position the clauses that have it as another prerequisite
+        self.conclusions: List[int] = []
+        self.prerequisite_counts: List[int] = []
+        self.clauses_by_prerequisite: List[List[int]] = [[] for _ in range(n_items)]
+        # Clauses without other prerequisites: their items can start any state
+        self.ready: List[int] = []
+        # Items without clauses, which can join any state
+        self.free_mask = 0
+        for position, item in enumerate(self.index.items):
+            clauses = surmise_function.get_clauses(item)
+            if not clauses:
+                self.free_mask |= 1 << position
+                continue
+            for clause in clauses:
+                # A clause that needs items outside the domain can never be satisfied
+                if not clause.prerequisites.issubset(self.index.positions):
+                    continue
+                number = len(self.conclusions)
+                self.conclusions.append(position)
+                others = [self.index.positions[prerequisite] for prerequisite in clause.prerequisites if prerequisite != item]
+                self.prerequisite_counts.append(len(others))
+                for other in others:
+                    self.clauses_by_prerequisite[other].append(number)
+                if not others:
+                    self.ready.append(number)
+
+    def interior_mask(self, mask: int) -> int:
+        """
+        Return the largest state contained in `mask`.
+
+        :param mask: Items, encoded with `index`.
+        """
+        mask &= self.full_mask
+        state = mask & self.free_mask
+        counts = self.prerequisite_counts.copy()
+        conclusions = self.conclusions
+        stack = []
+        remaining = state
+        while remaining:
+            low = remaining & -remaining
+            stack.append(low.bit_length() - 1)
+            remaining ^= low
+        for number in self.ready:
+            position = conclusions[number]
+            if mask >> position & 1 and not state >> position & 1:
+                state |= 1 << position
+                stack.append(position)
+
+        clauses_by_prerequisite = self.clauses_by_prerequisite
+        while stack:
+            for number in clauses_by_prerequisite[stack.pop()]:
+                counts[number] -= 1
+                if counts[number] == 0:
+                    position = conclusions[number]
+                    if mask >> position & 1 and not state >> position & 1:
+                        state |= 1 << position
+                        stack.append(position)
+        return state
+
+    def closure_mask(self, mask: int) -> int:
+        """Return the smallest mask containing `mask` whose complement is a state."""
+        return self.full_mask & ~self.interior_mask(self.full_mask & ~mask)
+
+    def is_state_mask(self, mask: int) -> bool:
+        """True if `mask` is a state, i.e. its own interior."""
+        return mask & ~self.full_mask == 0 and self.interior_mask(mask) == mask
+
+    def closure(self, items: Iterable[str]) -> FrozenSet[str]:
+        """
+        Return the items a student who failed `items` fails as well (including `items`).
+        Items outside the domain are ignored.
+        """
+        return self.index.decode(self.closure_mask(self._encode(items)))
+
+    def interior(self, items: Iterable[str]) -> FrozenSet[str]:
+        """Return the largest knowledge state contained in `items`."""
+        return self.index.decode(self.interior_mask(self._encode(items)))
+
+    def is_state(self, items: Iterable[str]) -> bool:
+        """True if `items` is a knowledge state (and has no items outside the domain)."""
+        items = set(items)
+        if not items.issubset(self.index.positions):
+            return False
+        return self.is_state_mask(self.index.encode(items))
+
+    def _encode(self, items: Iterable[str]) -> int:
+        positions = self.index.positions
+        return self.index.encode(item for item in items if item in positions)
+
+    def closure_masks(self, masks: Iterable[int]) -> List[int]:
+        """
+        `closure_mask` for many inputs. Equal inputs, common among response patterns,
+        are computed once.
+        """
+        return self._batch(self.closure_mask, masks)
+
+    def interior_masks(self, masks: Iterable[int]) -> List[int]:
+        """`interior_mask` for many inputs, computing equal inputs once."""
+        return self._batch(self.interior_mask, masks)
+
+    def is_state_masks(self, masks: Iterable[int]) -> List[bool]:
+        """`is_state_mask` for many inputs, computing equal inputs once."""
+        return self._batch(self.is_state_mask, masks)
+
+    @staticmethod
+    def _batch(function, masks: Iterable[int]) -> list:
+        results: Dict[int, object] = {}
+        output = []
+        for mask in masks:
+            result = results.get(mask)
+            if result is None:
+                result = results[mask] = function(mask)
+            output.append(result)
+        return output
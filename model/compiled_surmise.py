@@ -0,0 +1,157 @@
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from model.surmise_function import SurmiseFunction
+from model.item_index import ItemIndex
+
+
+def domain_index(surmise_function: SurmiseFunction, items: Optional[Iterable[str]] = None) -> Tuple[List[str], ItemIndex]:
+    """
+    Return the sorted item domain of a surmise function and an `ItemIndex` that assigns
+    its bits in reverse sorted order, as used by `CompiledSurmise`.
+
+    :param surmise_function: The surmise function.
+    :param items: The item domain. Defaults to every item mentioned in the surmise function.
+    """
+    if items is None:
+        items = surmise_function.mentioned_items()
+    items = sorted(set(items))
+    return items, ItemIndex(reversed(items))
+
+
+class CompiledSurmise:
+    def __init__(self, surmise_function: SurmiseFunction, items: Optional[Iterable[str]] = None):
+        """
+        Compile a surmise function into per-item tables of clause bitmasks, for fast
+        knowledge-state checks and enumeration.
+
+        Bits are assigned in reverse sorted item order (the last item gets bit 0). For
+        sets of equal size, descending mask order is then the same as comparing the
+        sorted item lists, which is the order `surmise_to_states` returns states in.
+
+        :param surmise_function: The surmise function to compile.
+        :param items: The item domain. Defaults to every item mentioned in the surmise function.
+        """
+        self.items, self.index = domain_index(surmise_function, items)
+        self.full_mask = self.index.full_mask
+
+        # clauses[position] -> clause masks of the item with that bit
+        self.clauses: List[List[int]] = [[] for _ in self.items]
+        for item, clauses in surmise_function.surmise.items():
+            if item not in self.index:
+                continue
+            position = self.index.positions[item]
+            for clause in clauses:
+                # A clause that needs items outside the domain can never be satisfied
+                if clause.prerequisites.issubset(self.index.positions):
+                    self.clauses[position].append(self.index.encode(clause.prerequisites))
+
+        # Items without clauses can join any state; the others are checked per state
+        self.free_mask = 0
+        self.constrained: List[Tuple[int, List[int]]] = []
+        for position, item in enumerate(self.index.items):
+            if surmise_function.get_clauses(item):
+                self.constrained.append((1 << position, self.clauses[position]))
+            else:
+                self.free_mask |= 1 << position
+
+    def can_add(self, state: int, position: int) -> bool:
+        """
+        True if the item with bit `position` has a clause satisfied by `state` plus that item.
+        Adding an item never breaks the clauses of items already in a state, so for a
+        known state this is the only check needed.
+        """
+        if self.free_mask >> position & 1:
+            return True
+        extended = state | (1 << position)
+        for clause in self.clauses[position]:
+            if clause & ~extended == 0:
+                return True
+        return False
+
+    def is_state(self, mask: int) -> bool:
+        """True if every item in `mask` has at least one clause contained in `mask`."""
+        remaining = mask & ~self.free_mask
+        while remaining:
+            low = remaining & -remaining
+            if not any(clause & ~mask == 0 for clause in self.clauses[low.bit_length() - 1]):
+                return False
+            remaining ^= low
+        return True
+
+    def addable(self, state: int) -> int:
+        """Return the mask of items that can be added to the known state `state`."""
+        addable = self.free_mask & ~state
+        for bit, clauses in self.constrained:
+            if not state & bit:
+                extended = state | bit
+                for clause in clauses:
+                    if clause & ~extended == 0:
+                        addable |= bit
+                        break
+        return addable
+
+    def states(self, max_size: Optional[int] = None) -> Iterator[int]:
+        """
+        Enumerate the knowledge states reachable from the empty state by adding one item
+        at a time, as masks ordered by size and then by their sorted item lists.
+
+        States are generated level by level: each state of size k is extended by the
+        items whose clauses it can satisfy (`addable`), so every state costs one clause
+        check per absent item, and only two levels are held in memory at once.
+
+        :param max_size: If given, stop after the states with this many items.
+        """
+        level = [0]
+        size = 0
+        while level:
+            yield from level
+            if max_size is not None and size >= max_size:
+                return
+            next_level = set()
+            for state in level:
+                addable = self.addable(state)
+                while addable:
+                    low = addable & -addable
+                    next_level.add(state | low)
+                    addable ^= low
+            level = sorted(next_level, reverse=True)
+            size += 1
+
+    def states_depth_first(self, max_size: Optional[int] = None) -> Iterator[int]:
+        """
+        Enumerate the same states as `states`, in no particular order, holding only the
+        current path in memory (reverse search).
+
+        Every state has one canonical build sequence: repeatedly add its lowest-bit item
+        that can be added. The parent of a state is the state without the last item of that
+        sequence, so the states form a tree that is walked depth first. K plus an item x is
+        a child of K if no step of K's sequence could have taken x before the item it took,
+        i.e. x was never addable with a lower bit than that item. Those items are collected
+        along the path in a `blocked` mask, so a child is checked with one mask operation.
+
+        :param max_size: If given, do not extend states with this many items.
+        """
+        yield 0
+        if max_size is not None and max_size <= 0:
+            return
+        addable = self.addable(0)
+        # Per state on the path: (state, its addable items, blocked items, children left)
+        stack = [(0, addable, 0, addable)]
+        while stack:
+            state, addable, blocked, children = stack[-1]
+            if not children:
+                stack.pop()
+                continue
+            low = children & -children
+            stack[-1] = (state, addable, blocked, children ^ low)
+            child = state | low
+            yield child
+            # The frame of a state with k items is stack[k], so the child has len(stack) items
+            if max_size is None or len(stack) < max_size:
+                child_blocked = blocked | (addable & (low - 1))
+                child_addable = self.addable(child)
+                stack.append((child, child_addable, child_blocked, child_addable & ~child_blocked))
+
+    def decode(self, mask: int):
+        """Return the items of a state mask as a frozenset."""
+        return self.index.decode(mask)
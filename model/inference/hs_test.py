@@ -1,21 +1,54 @@
+from collections import defaultdict
+from typing import Iterable, List
+
 from model.query import Query
 from model.surmise_function import SurmiseFunction
+from model.item_index import is_singleton
 
 def hs_test(query: Query, surmise_function: SurmiseFunction) -> bool:
     """
     Perform the HS-test on a query to determine if it's hanging-safe.
 
+    The test fails if some item r in the antecedent A has a clause C with q ∈ C and
+    A ∩ C = {r}. Only clauses containing q can fail it, so they are taken from the
+    surmise function's prerequisite index instead of looping over every clause of A.
+
     :param query: The query to be tested.
     :return: True if the query passes the HS-test, False otherwise.
     """
-    A = query.antecedent  # antecedent set
-    q = query.question    # query item
-
-    # For each item r in A
-    for r in A:
-        # For each clause C for r
-        for clause in surmise_function.get_clauses(r):
-            intersection = A & clause.prerequisites
-            if len(intersection) == 1 and q in clause.prerequisites:
-                return False
+    index = surmise_function.item_index
+    A = index.encode(query.antecedent)  # antecedent mask
+    return _passes(A, surmise_function.get_clauses_with_prerequisite(query.question), index)
+
+
+def hs_test_many(queries: Iterable[Query], surmise_function: SurmiseFunction) -> List[bool]:
+    """
+    Perform the HS-test on a batch of queries (e.g. the whole pending table) in one pass.
+    Queries are grouped by question, so the clause lookup is shared within each group.
+
+    :param queries: The queries to be tested.
+    :return: One result per query, in input order (True if it passes the HS-test).
+    """
+    queries = list(queries)
+    index = surmise_function.item_index
+    by_question = defaultdict(list)
+    for position, query in enumerate(queries):
+        by_question[query.question].append(position)
+
+    results = [True] * len(queries)
+    for question, positions in by_question.items():
+        clauses = surmise_function.get_clauses_with_prerequisite(question)
+        if not clauses:
+            continue
+        for position in positions:
+            A = index.encode(queries[position].antecedent)
+            results[position] = _passes(A, clauses, index)
+    return results
+
+
+def _passes(A: int, clauses, index) -> bool:
+    # For each clause C containing q, of an item r in A
+    for r, clause in clauses:
+        if A & index.bit(r) and is_singleton(A & clause):
+            return False
     return True
@@ -0,0 +1,170 @@
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+from model.clause import Clause
+from model.query import Query
+
+
+class ItemIndex:
+    def __init__(self, items: Iterable[str] = ()):
+        """
+        Registry that assigns every item a bit position, so that item sets can be
+        represented as integer bitmasks. Subset, union and intersection tests on
+        masks are plain int operations.
+
+        Items that are not known yet are registered on first use, so masks stay
+        valid for clauses and queries that mention items outside the initial list.
+
+        :param items: Item IDs to register, in the order their bits are assigned.
+        """
+        self.items: List[str] = []
+        self.positions: Dict[str, int] = {}
+        self._masks: Dict[FrozenSet[str], int] = {}
+        # Shared objects of the factories below
+        self._sets: Dict[int, FrozenSet[str]] = {}
+        self._queries: Dict[Optional[int], Dict[Tuple[int, str], Query]] = {}
+        self._clauses: Dict[Tuple[int, str], Clause] = {}
+        for item in items:
+            self.add(item)
+
+    def add(self, item: str) -> int:
+        """Register an item (if needed) and return its bit position."""
+        position = self.positions.get(item)
+        if position is None:
+            position = len(self.items)
+            self.items.append(item)
+            self.positions[item] = position
+        return position
+
+    def bit(self, item: str) -> int:
+        """Return the single-bit mask of an item."""
+        return 1 << self.add(item)
+
+    def encode(self, items: Iterable[str]) -> int:
+        """
+        Return the bitmask of a set of items. Masks of frozensets are cached, so
+        repeated encoding of the same antecedent or clause is a dict lookup.
+        """
+        if isinstance(items, frozenset):
+            mask = self._masks.get(items)
+            if mask is None:
+                mask = self._encode(items)
+                self._masks[items] = mask
+            return mask
+        return self._encode(items)
+
+    def _encode(self, items: Iterable[str]) -> int:
+        mask = 0
+        for item in items:
+            mask |= 1 << self.add(item)
+        return mask
+
+    def decode(self, mask: int) -> FrozenSet[str]:
+        """Return the items whose bits are set in `mask`."""
+        return frozenset(self.iter_items(mask))
+
+    def item_set(self, mask: int) -> FrozenSet[str]:
+        """
+        Like `decode`, but the frozenset is kept and returned again for the same mask, so
+        the queries and clauses made by this index share their item sets.
+        """
+        items = self._sets.get(mask)
+        if items is None:
+            items = self.decode(mask)
+            self._sets[mask] = items
+            self._masks.setdefault(items, mask)
+        return items
+
+    def query(self, mask: int, question: str, answer: Optional[int] = None) -> Query:
+        """
+        Return the query `mask`→`question` with the given answer, creating it on first use.
+        There is one object per (mask, question) and answer, so queries made here compare
+        by identity; their answer must not be changed.
+
+        :param mask: Bitmask of the antecedent.
+        :param question: The item asked about.
+        :param answer: The answer the query carries (1 for P_yes, 0 for P_no).
+        """
+        queries = self._queries.get(answer)
+        if queries is None:
+            queries = self._queries[answer] = {}
+        key = (mask, question)
+        query = queries.get(key)
+        if query is None:
+            query = queries[key] = Query(self.item_set(mask), question, answer)
+        return query
+
+    def release_query(self, mask: int, question: str, answer: Optional[int] = None):
+        """Forget the shared query `mask`→`question` (e.g. a hypothetical fact that was rolled back)."""
+        queries = self._queries.get(answer)
+        if queries is not None:
+            queries.pop((mask, question), None)
+
+    def checkpoint(self) -> Tuple[int, int]:
+        """Mark the size of the item set caches, see `rollback`."""
+        return len(self._sets), len(self._masks)
+
+    def rollback(self, checkpoint: Tuple[int, int]):
+        """
+        Drop the item sets and cached masks added since `checkpoint` (e.g. by hypothetical
+        facts that were rolled back). Objects made before keep their item sets; only the
+        sharing of later ones is lost.
+        """
+        n_sets, n_masks = checkpoint
+        while len(self._sets) > n_sets:
+            self._sets.popitem()
+        while len(self._masks) > n_masks:
+            self._masks.popitem()
+
+    def clause(self, mask: int, item: str) -> Clause:
+        """
+        Return the clause of `item` with prerequisites `mask` (which should include the
+        item's own bit), creating it on first use.
+        """
+        key = (mask, item)
+        clause = self._clauses.get(key)
+        if clause is None:
+            clause = self._clauses[key] = Clause(self.item_set(mask), item)
+        return clause
+
+    def iter_items(self, mask: int) -> Iterator[str]:
+        """Yield the items of a mask in bit order."""
+        while mask:
+            low = mask & -mask
+            yield self.items[low.bit_length() - 1]
+            mask ^= low
+
+    @property
+    def full_mask(self) -> int:
+        """Mask with a bit set for every registered item."""
+        return (1 << len(self.items)) - 1
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __contains__(self, item) -> bool:
+        return item in self.positions
+
+    def __repr__(self) -> str:
+        return f"ItemIndex(items={self.items})"
+
+
+def is_subset(a: int, b: int) -> bool:
+    """True if every bit of mask `a` is also set in mask `b`."""
+    return a & ~b == 0
+
+
+def is_singleton(mask: int) -> bool:
+    """True if exactly one bit is set in `mask`."""
+    return mask != 0 and mask & (mask - 1) == 0
+
+
+def popcount(mask: int) -> int:
+    """Number of items in a mask."""
+    return mask.bit_count()
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Yield the single-bit masks of `mask`, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low
+        mask ^= low
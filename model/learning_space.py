@@ -1,21 +1,28 @@
-from typing import List, Set
+from collections import defaultdict, deque
+from itertools import islice
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
 from model.surmise_function import SurmiseFunction
 from model.query import Query
 from model.inference.hs_test import hs_test
-
-import copy
+from model.item_index import ItemIndex, is_subset, popcount
 
 
 class LearningSpace:
-    def __init__(self, initial_items: List[str], surmise_function: SurmiseFunction):
+    def __init__(self, initial_items: List[str], surmise_function: SurmiseFunction, materialize_inferences: bool = True):
         """
         Initialize the learning space with a set of items and a surmise function.
         
         :param initial_items: A list of item IDs in the learning space.
         :param surmise_function: The surmise function that defines item dependencies.
+        :param materialize_inferences: If True, every answer is followed by draw_inference, which
+            stores all derivable queries in P_yes/P_no. If False, only accepted answers are stored
+            and `entails` decides the rest on demand.
         """
         self.items = set(initial_items)
+        self.materialize_inferences = materialize_inferences
+        self.item_index = ItemIndex(initial_items)  # Bit positions for item-set masks
         self.surmise_function = surmise_function
+        self.surmise_function.set_item_index(self.item_index)
         self.pending_table = []  # Queries that need to be reconsidered
         self.r_store = []  # Temporary store for pending queries
         self.P_yes = set()
@@ -24,6 +31,29 @@ class LearningSpace:
         self.inferred_no = set()
         self.queries_answered = 0
 
+        # Persistent (antecedent mask, question) -> Query lookups of P_yes / P_no,
+        # and the facts not yet joined by draw_inference (semi-naive delta)
+        self._yes_lookup: Dict[Tuple[int, str], Query] = {}
+        self._no_lookup: Dict[Tuple[int, str], Query] = {}
+        self._delta_yes: List[Tuple[int, str]] = []
+        self._delta_no: List[Tuple[int, str]] = []
+
+        # Join indexes for [IR1]-[IR4]: positive facts by antecedent item, by question
+        # and by antecedent mask; negative facts by antecedent mask
+        self._yes_by_item: Dict[str, List[Tuple[int, str]]] = defaultdict(list)
+        self._yes_by_question: Dict[str, List[Tuple[int, str]]] = defaultdict(list)
+        self._yes_by_antecedent: Dict[int, List[Tuple[int, str]]] = defaultdict(list)
+        self._no_by_antecedent: Dict[int, List[Tuple[int, str]]] = defaultdict(list)
+
+        # Closures of negative antecedents, valid while the number of positive facts is unchanged
+        self._negative_closures: List[Tuple[int, str]] = []
+        self._negative_closures_version = None
+        # Closure of B -> per item r, the questions q whose addition to that closure derives r
+        self._negative_blockers: Dict[int, List[int]] = {}
+
+        # Callbacks told about every query that enters P_yes / P_no
+        self._listeners: List[Callable[[List[Query]], None]] = []
+
 
     def apply_query(self, query: Query):
         """
@@ -39,113 +69,485 @@ class LearningSpace:
                 # Update surmise function
                 self.surmise_function.add_clause(query.question, set(query.antecedent))
                 # Accept query
-                self.P_yes.add(query)
-                self.draw_inference()
+                self._accept_yes(query)
+                if self.materialize_inferences:
+                    self.draw_inference()
             else:
                 self.pending_table.append(query)
 
         ### If the query response is "No" ###
         elif query.answer == 0: 
-            self.P_no.add(query)
-            self.draw_inference()
+            self._accept_no(query)
+            if self.materialize_inferences:
+                self.draw_inference()
         self.queries_answered += 1
         
     def run_second_stage(self):
         """
         Run the second stage of the adapted QUERY algorithm.
         Process the pending table using the HS-test until it is empty.
+
+        Pending queries are kept on a work queue. The HS-test of a query with antecedent A
+        only looks at the clauses of the items in A, so a failed query waits on those items
+        and is queued again only when a clause is added for one of them. The stage ends when
+        the queue is empty.
         """
-        while self.pending_table:
-            self.r_store = list(self.pending_table)
-            old_surmise = copy.deepcopy(self.surmise_function)
-            self.pending_table = []
+        self.r_store = deque(self.pending_table)
+        queued = {id(query) for query in self.r_store}
+        failed: Dict[int, Query] = {}  # Queries that failed their latest HS-test, in order
+        waiting: Dict[str, Dict[int, Query]] = defaultdict(dict)  # item -> failed queries with it in A
+        self.pending_table = []
+
+        while self.r_store:
+            query = self.r_store.popleft()
+            queued.discard(id(query))
 
-            for query in self.r_store:
-                if hs_test(query, self.surmise_function):
-                    # Accept the query
-                    self.P_yes.add(query)
-                    self.surmise_function.add_clause(query.question, set(query.antecedent))
+            if hs_test(query, self.surmise_function):
+                # Accept the query
+                failed.pop(id(query), None)
+                self._accept_yes(query)
+                self.surmise_function.add_clause(query.question, set(query.antecedent))
+                if self.materialize_inferences:
                     self.draw_inference()
-                else:
-                    # Not implementable, try again later
-                    print(f"Could not implement query: {query}")
-                    self.pending_table.append(query)
 
-            if old_surmise == self.surmise_function:
-                break
-            
+                # The clauses of query.question changed: retry the queries that depend on them
+                for waiting_query in waiting.pop(query.question, {}).values():
+                    if id(waiting_query) in failed and id(waiting_query) not in queued:
+                        self.r_store.append(waiting_query)
+                        queued.add(id(waiting_query))
+            else:
+                # Not implementable, try again when one of its antecedent items gets a clause
+                print(f"Could not implement query: {query}")
+                failed[id(query)] = query
+                for item in query.antecedent:
+                    waiting[item][id(query)] = query
+
+        self.pending_table = list(failed.values())
         self.r_store = []
 
         
-    def draw_inference(self):
+    def subscribe(self, listener: Callable[[List[Query]], None]):
+        """
+        Register a callback that is called as `listener(queries)` with the queries that were
+        newly added to P_yes or P_no, by an accepted answer or by draw_inference.
+
+        :param listener: The callback to register.
+        """
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[List[Query]], None]):
+        """
+        Remove a callback registered with subscribe.
+
+        :param listener: The callback to remove.
+        """
+        self._listeners.remove(listener)
+
+    def _notify(self, queries: List[Query]):
+        if queries:
+            for listener in list(self._listeners):
+                listener(queries)
+
+    def _accept_yes(self, query: Query):
+        """Add a positive query to P_yes and queue it for the next inference round."""
+        key = (self.item_index.encode(query.antecedent), query.question)
+        if key not in self._yes_lookup:
+            self._yes_lookup[key] = query
+            self._index_yes(key)
+            self._delta_yes.append(key)
+        self.P_yes.add(query)
+        self._notify([query])
+
+    def _accept_no(self, query: Query):
+        """Add a negative query to P_no and queue it for the next inference round."""
+        key = (self.item_index.encode(query.antecedent), query.question)
+        if key not in self._no_lookup:
+            self._no_lookup[key] = query
+            self._index_no(key)
+            self._delta_no.append(key)
+        self.P_no.add(query)
+        self._notify([query])
+
+    def _index_yes(self, key: Tuple[int, str]):
+        """Register a positive fact in the join indexes."""
+        A, p = key
+        for item in self.item_index.iter_items(A):
+            self._yes_by_item[item].append(key)
+        self._yes_by_question[p].append(key)
+        self._yes_by_antecedent[A].append(key)
+
+    def _index_no(self, key: Tuple[int, str]):
+        """Register a negative fact in the join indexes."""
+        self._no_by_antecedent[key[0]].append(key)
+
+    def _sync_lookups(self):
+        """Pick up queries that were added to P_yes / P_no directly instead of through _accept_*."""
+        added = []
+        if len(self._yes_lookup) != len(self.P_yes):
+            for query in self.P_yes:
+                key = (self.item_index.encode(query.antecedent), query.question)
+                if key not in self._yes_lookup:
+                    self._yes_lookup[key] = query
+                    self._index_yes(key)
+                    self._delta_yes.append(key)
+                    added.append(query)
+        if len(self._no_lookup) != len(self.P_no):
+            for query in self.P_no:
+                key = (self.item_index.encode(query.antecedent), query.question)
+                if key not in self._no_lookup:
+                    self._no_lookup[key] = query
+                    self._index_no(key)
+                    self._delta_no.append(key)
+                    added.append(query)
+        self._notify(added)
+
+    def draw_inference(self, semi_naive: bool = True, max_derived: Optional[int] = None):
         """
         Apply the four inference rules [IR1]-[IR4] to the current sets of positive (P_yes)
         and negative (P_no) queries until no further inferences can be made.
+
+        Evaluation is semi-naive: each round only joins the facts that are new since the
+        previous round (the delta) against all known facts, and the lookup tables persist
+        between calls. With `semi_naive=False` every known fact is joined again, which
+        gives the same result as recomputing the fixpoint from scratch.
+
+        :param max_derived: Stop as soon as more than this many facts have been derived. The
+            fixpoint is then incomplete, so this is only meant for what-if evaluation that is
+            rolled back (`evaluate_answer`).
         """
-        changed = True
-        while changed:
-            changed = False
-            new_yes = set()
-            new_no = set()
-
-            # Convert current positive/negative queries into lookup tables
-            P_yes_lookup = {(frozenset(q.antecedent), q.question) for q in self.P_yes}
-            P_no_lookup = {(frozenset(q.antecedent), q.question) for q in self.P_no}
-
-            # Apply IR1 and IR2: Positive × Positive
-            for q1 in self.P_yes:
-                A, p = set(q1.antecedent), q1.question
-                for q2 in self.P_yes:
-                    B, q = set(q2.antecedent), q2.question
-
-                    # IR1: If A→p and B→q, and p ∈ B, then (A ∪ {p})→q
-                    if p in B:
-                        inferred = Query(list(A | {p}), q, answer=1)
-                        key = (frozenset(inferred.antecedent), inferred.question)
-                        if key not in P_yes_lookup:
-                            new_yes.add(inferred)
-                            P_yes_lookup.add(key)
-
-                    # IR2: If A→p and B→q, and p ∈ B, then A→q
-                    if p in B:
-                        inferred = Query(list(A), q, answer=1)
-                        key = (frozenset(inferred.antecedent), inferred.question)
-                        if key not in P_yes_lookup:
-                            new_yes.add(inferred)
-                            P_yes_lookup.add(key)
-
-            # Apply IR3 and IR4: Positive × Negative
-            for q_pos in self.P_yes:
-                A, p = set(q_pos.antecedent), q_pos.question
-                for q_neg in self.P_no:
-                    B, q = set(q_neg.antecedent), q_neg.question
-
-                    # IR3: If B→¬q and (B ∪ {q})→p, then B→¬p
-                    if (B | {q}) == A and p == q_pos.question:
-                        inferred = Query(list(B), p, answer=0)
-                        key = (frozenset(inferred.antecedent), inferred.question)
-                        if key not in P_no_lookup:
-                            new_no.add(inferred)
-                            P_no_lookup.add(key)
+        self._sync_lookups()
+        if not semi_naive:
+            self._delta_yes = list(self._yes_lookup)
+            self._delta_no = list(self._no_lookup)
+
+        index = self.item_index
+        yes_lookup = self._yes_lookup
+        no_lookup = self._no_lookup
+        new_yes: List[Tuple[int, str]] = []
+        new_no: List[Tuple[int, str]] = []
+
+        remaining = max_derived  # Derivations left before stopping
+
+        def derive_yes(key):
+            if key not in yes_lookup:
+                yes_lookup[key] = index.query(key[0], key[1], 1)
+                new_yes.append(key)
+                if remaining is not None and len(new_yes) + len(new_no) > remaining:
+                    raise _DerivationLimit
+
+        def derive_no(key):
+            if key not in no_lookup:
+                no_lookup[key] = index.query(key[0], key[1], 0)
+                new_no.append(key)
+                if remaining is not None and len(new_yes) + len(new_no) > remaining:
+                    raise _DerivationLimit
+
+        yes_by_item = self._yes_by_item
+        yes_by_question = self._yes_by_question
+        yes_by_antecedent = self._yes_by_antecedent
+        no_by_antecedent = self._no_by_antecedent
+
+        stopped = False
+        while (self._delta_yes or self._delta_no) and not stopped:
+            delta_yes, self._delta_yes = self._delta_yes, []
+            delta_no, self._delta_no = self._delta_no, []
+
+            try:
+                for A, p in delta_yes:
+                    p_bit = index.bit(p)
+
+                    # IR1 and IR2 with the new fact as A→p: every B→q with p ∈ B
+                    for B, q in yes_by_item.get(p, ()):
+                        # IR1: If A→p and B→q, and p ∈ B, then (A ∪ {p})→q
+                        derive_yes((A | p_bit, q))
+                        # IR2: If A→p and B→q, and p ∈ B, then A→q
+                        derive_yes((A, q))
+
+                    # IR1 and IR2 with the new fact as B→q: every C→r with r ∈ A
+                    for r in index.iter_items(A):
+                        r_bit = index.bit(r)
+                        for C, _ in yes_by_question.get(r, ()):
+                            derive_yes((C | r_bit, p))
+                            derive_yes((C, p))
+
+                    # IR3: If B→¬q and (B ∪ {q})→p, then B→¬p, for every q ∈ A with B = A \ {q} or B = A
+                    for q in index.iter_items(A):
+                        for B in (A & ~index.bit(q), A):
+                            if (B, q) in no_lookup:
+                                derive_no((B, p))
 
                     # IR4: If A→p and (A ∪ {p})→¬q, then (A ∪ {p})→¬q
-                    if (A | {p}) == set(q_neg.antecedent) and q == q_neg.question:
-                        inferred = Query(list(A | {p}), q, answer=0)
-                        key = (frozenset(inferred.antecedent), inferred.question)
-                        if key not in P_no_lookup:
-                            new_no.add(inferred)
-                            P_no_lookup.add(key)
+                    for key in no_by_antecedent.get(A | p_bit, ()):
+                        derive_no(key)
 
-            # If we inferred anything new, update and keep looping
-            if new_yes or new_no:
-                self.inferred_yes.update(new_yes)
-                self.inferred_no.update(new_no)
-                self.P_yes.update(new_yes)
-                self.P_no.update(new_no)
-                changed = True
+                # IR3 with the new fact as the negative premise: every (B ∪ {q})→p.
+                # IR4 only restates its negative premise, so there is nothing to join here.
+                for B, q in delta_no:
+                    for _, p in yes_by_antecedent.get(B | index.bit(q), ()):
+                        derive_no((B, p))
+            except _DerivationLimit:
+                stopped = True  # Keep what was derived so far and stop
 
+            # Whatever was inferred this round is indexed and becomes the delta of the next one
+            for key in new_yes:
+                query = yes_lookup[key]
+                self._index_yes(key)
+                self.inferred_yes.add(query)
+                self.P_yes.add(query)
+            for key in new_no:
+                query = no_lookup[key]
+                self._index_no(key)
+                self.inferred_no.add(query)
+                self.P_no.add(query)
+            self._notify([yes_lookup[key] for key in new_yes] + [no_lookup[key] for key in new_no])
+            self._delta_yes, self._delta_no = new_yes, new_no
+            if remaining is not None:
+                remaining -= len(new_yes) + len(new_no)
+            new_yes, new_no = [], []
 
 
+
+    def closure(self, items: Iterable[str]) -> Set[str]:
+        """
+        Return every item a student who failed `items` is entailed to fail, i.e. the closure
+        of `items` under the accepted positive queries read as Horn implications.
+
+        :param items: The failed items (antecedent).
+        :return: The set of items in the closure, including `items` themselves.
+        """
+        return set(self.item_index.iter_items(self._closure_mask(self.item_index.encode(items))))
+
+    def _closure_mask(self, mask: int) -> int:
+        """
+        LinClosure-style forward chaining over P_yes: every implication A→p keeps a counter
+        of antecedent items not yet in the closure and fires when it reaches zero, so each
+        implication is touched at most |A| times.
+        """
+        index = self.item_index
+        closed = mask
+        stack = list(index.iter_items(mask))
+        for _, p in self._yes_by_antecedent.get(0, ()):
+            p_bit = index.bit(p)
+            if not closed & p_bit:
+                closed |= p_bit
+                stack.append(p)
+
+        counters: Dict[Tuple[int, str], int] = {}
+        while stack:
+            item = stack.pop()
+            for key in self._yes_by_item.get(item, ()):
+                remaining = counters.get(key)
+                if remaining is None:
+                    remaining = popcount(key[0])
+                remaining -= 1
+                counters[key] = remaining
+                if remaining == 0:
+                    p_bit = index.bit(key[1])
+                    if not closed & p_bit:
+                        closed |= p_bit
+                        stack.append(key[1])
+        return closed
+
+    def _refresh_negative_closures(self) -> List[Tuple[int, str]]:
+        """Return (closure of B, q) for every B→¬q in P_no, recomputing only what is stale."""
+        version = (len(self._yes_lookup), len(self.item_index))
+        if version != self._negative_closures_version:
+            self._negative_closures = []
+            self._negative_blockers = {}
+            self._negative_closures_version = version
+        done = len(self._negative_closures)
+        for B, q in islice(self._no_lookup, done, None):
+            self._negative_closures.append((self._closure_mask(B), q))
+        return self._negative_closures
+
+    def _blockers(self, closure_B: int) -> List[int]:
+        """
+        For a closure of a negative antecedent, return per item position r the mask of
+        questions q for which the closure of (closure_B ∪ {q}) contains r. It does not
+        depend on the query's antecedent, so it is computed once per closure and shared
+        by all negative facts with that closure (call `_refresh_negative_closures` first).
+        """
+        blockers = self._negative_blockers.get(closure_B)
+        if blockers is None:
+            index = self.item_index
+            full_mask = index.full_mask
+            blockers = [full_mask if closure_B >> position & 1 else 0 for position in range(len(index))]
+            outside = full_mask & ~closure_B
+            remaining = outside
+            while remaining:
+                q_bit = remaining & -remaining
+                remaining ^= q_bit
+                derived = self._closure_mask(closure_B | q_bit) & outside
+                while derived:
+                    r_bit = derived & -derived
+                    derived ^= r_bit
+                    blockers[r_bit.bit_length() - 1] |= q_bit
+            self._negative_blockers[closure_B] = blockers
+        return blockers
+
+    def entails(self, antecedent: Iterable[str], question: str) -> Optional[int]:
+        """
+        Decide a query from the accepted answers without it being in P_yes/P_no.
+
+        Yes if `question` is in the closure of `antecedent`. No if accepting the query
+        would contradict an accepted negative query B→¬r: the antecedent lies in the
+        closure of B, and adding the question to that closure derives r.
+
+        :param antecedent: Items the student is assumed to have failed.
+        :param question: The item asked about.
+        :return: 1 (entailed yes), 0 (entailed no) or None (unknown).
+        """
+        self._sync_lookups()
+        index = self.item_index
+        A = index.encode(frozenset(antecedent))
+        key = (A, question)
+        if key in self._yes_lookup:
+            return 1
+        if key in self._no_lookup:
+            return 0
+
+        q_bit = index.bit(question)
+        if self._closure_mask(A) & q_bit:
+            return 1
+
+        for closure_B, r in self._refresh_negative_closures():
+            if is_subset(A, closure_B) and self._blockers(closure_B)[index.positions[r]] & q_bit:
+                return 0
+        return None
+
+
+    def entailed_questions(self, antecedent: Iterable[str]) -> Dict[str, int]:
+        """
+        Decide every question for one antecedent at once, as `entails` would.
+
+        The closure of the antecedent is computed a single time and answers all positive
+        questions; every negative query whose closure contains the antecedent then refutes
+        a whole mask of questions at once (see `_blockers`).
+
+        :param antecedent: Items the student is assumed to have failed.
+        :return: Mapping of each decided question (outside the antecedent) to 1 or 0.
+        """
+        self._sync_lookups()
+        index = self.item_index
+        A = index.encode(frozenset(antecedent))
+        closed = self._closure_mask(A)
+        decided = {item: 1 for item in index.iter_items(closed & ~A)}
+        for key in self._no_by_antecedent.get(A, ()):
+            if key not in self._yes_lookup:
+                decided[key[1]] = 0
+
+        refuted = 0
+        for closure_B, r in self._refresh_negative_closures():
+            if is_subset(A, closure_B):
+                refuted |= self._blockers(closure_B)[index.positions[r]]
+        for question in index.iter_items(refuted & ~closed):
+            decided.setdefault(question, 0)
+        return decided
+
+    def snapshot(self) -> Tuple:
+        """
+        Return a compact, picklable copy of the state that inference and the HS-test use:
+        the item order, the positive and negative facts as (antecedent mask, question) and
+        the clause masks per item. See `from_snapshot`.
+        """
+        self._sync_lookups()
+        sf = self.surmise_function
+        return (
+            tuple(self.item_index.items),
+            tuple(self._yes_lookup),
+            tuple(self._no_lookup),
+            tuple((item, tuple(masks)) for item, masks in sf.clause_masks.items()),
+            sf.minimal,
+            self.materialize_inferences,
+        )
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Tuple) -> "LearningSpace":
+        """
+        Rebuild a learning space from `snapshot()`. The facts are taken as already drawn,
+        so they are not joined again.
+
+        :param snapshot: The value returned by `snapshot()`.
+        """
+        items, yes_keys, no_keys, clauses, minimal, materialize_inferences = snapshot
+        learning_space = cls(list(items), SurmiseFunction(minimal=minimal), materialize_inferences)
+        index = learning_space.item_index
+        for item, masks in clauses:
+            for mask in masks:
+                learning_space.surmise_function.add_clause(item, index.decode(mask))
+        for A, q in yes_keys:
+            learning_space._accept_yes(index.query(A, q, 1))
+        for A, q in no_keys:
+            learning_space._accept_no(index.query(A, q, 0))
+        learning_space._delta_yes, learning_space._delta_no = [], []
+        return learning_space
+
+    def evaluate_answer(self, query: Query, answer: int, max_derived: Optional[int] = None) -> int:
+        """
+        Count the queries a hypothetical answer would add to P_yes/P_no through inference,
+        without changing the learning space.
+
+        The answer is accepted as usual (a yes only if it passes the HS-test) and joined with
+        the known facts by draw_inference; every fact derived on the way is then removed
+        again. Listeners are not notified.
+
+        :param query: The query to answer.
+        :param answer: 1 (yes) or 0 (no).
+        :param max_derived: Stop counting at this many queries. A single answer can derive tens
+            of thousands of facts when inferences are materialised; the cap bounds the cost.
+        :return: The number of queries derived from the answer, not counting the query itself
+            (at most `max_derived`).
+        """
+        self._sync_lookups()
+        key = (self.item_index.encode(query.antecedent), query.question)
+        if key in self._yes_lookup or key in self._no_lookup:
+            return 0
+        if answer == 1 and not hs_test(query, self.surmise_function):
+            return 0  # It would wait in the pending table
+        if answer not in (0, 1):
+            return 0
+
+        n_yes, n_no = len(self._yes_lookup), len(self._no_lookup)
+        checkpoint = self.item_index.checkpoint()
+        listeners, self._listeners = self._listeners, []
+        delta_yes, delta_no = self._delta_yes, self._delta_no
+        self._delta_yes, self._delta_no = [], []
+        try:
+            if answer == 1:
+                self._accept_yes(self.item_index.query(key[0], query.question, 1))
+            else:
+                self._accept_no(self.item_index.query(key[0], query.question, 0))
+            self.draw_inference(max_derived=max_derived)
+            derived = len(self._yes_lookup) - n_yes + len(self._no_lookup) - n_no - 1
+            return derived if max_derived is None else min(derived, max_derived)
+        finally:
+            self._rollback(n_yes, n_no)
+            self.item_index.rollback(checkpoint)
+            self._listeners = listeners
+            self._delta_yes, self._delta_no = delta_yes, delta_no
+
+    def _rollback(self, n_yes: int, n_no: int):
+        """Remove every fact added after P_yes/P_no had `n_yes`/`n_no` entries, newest first."""
+        index = self.item_index
+        for key in reversed(list(islice(self._yes_lookup, n_yes, None))):
+            query = self._yes_lookup.pop(key)
+            A, p = key
+            for item in index.iter_items(A):
+                _remove_last(self._yes_by_item[item], key)
+            _remove_last(self._yes_by_question[p], key)
+            _remove_last(self._yes_by_antecedent[A], key)
+            self.P_yes.discard(query)
+            self.inferred_yes.discard(query)
+            index.release_query(A, p, 1)
+        for key in reversed(list(islice(self._no_lookup, n_no, None))):
+            query = self._no_lookup.pop(key)
+            _remove_last(self._no_by_antecedent[key[0]], key)
+            self.P_no.discard(query)
+            self.inferred_no.discard(query)
+            index.release_query(key[0], key[1], 0)
+        # The closure caches may hold what-if facts
+        self._negative_closures_version = None
+
     def process_pending_queries(self):
         """
         Process the pending queries and check if they become hanging-safe.
@@ -204,4 +606,16 @@ class LearningSpace:
         lines.append(f"    - Inferred YES: {len(self.inferred_yes)}")
         lines.append(f"    - Inferred NO:  {len(self.inferred_no)}")
         
-        return "\n".join(lines)
\ No newline at end of file
+        return "\n".join(lines)
+
+
+class _DerivationLimit(Exception):
+    """Raised inside draw_inference when `max_derived` is exceeded."""
+
+
+def _remove_last(entries: list, entry):
+    """Remove `entry` from a list, looking at the end first, where the newest entries are."""
+    if entries and entries[-1] == entry:
+        entries.pop()
+    else:
+        entries.remove(entry)
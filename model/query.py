@@ -1,18 +1,25 @@
 from typing import List, Optional
 
 class Query:
+    __slots__ = ("antecedent", "question", "answer", "_hash")
+
     def __init__(self, antecedent: List[str], question: str, answer: Optional[int] = None):
         """
         Represents an expert query of the form:
         "If a student fails items in `antecedent`, will they also fail `question`?"
+
+        Queries are hashed on (antecedent, question) only; the hash is computed once, so
+        antecedent and question must not be reassigned. To share one object per
+        (antecedent, question, answer), create queries with `ItemIndex.query`.
         
         :param antecedent: List of item IDs the student is assumed to have failed
         :param question: The item ID the expert is asked about
         :param answer: Expert's answer: 1 (yes), 0 (no), -1 (unsure), or None (unanswered)
         """
-        self.antecedent = frozenset(antecedent)
+        self.antecedent = antecedent if isinstance(antecedent, frozenset) else frozenset(antecedent)
         self.question = question
         self.answer = answer
+        self._hash = hash((self.antecedent, question))
 
     def antecedent_size(self) -> int:
         """Returns the size of the antecedent set (the 'if failed these' part)."""
@@ -25,13 +32,23 @@ class Query:
         )
     
     def __eq__(self, other) -> bool:
+        if self is other:
+            return True
         if not isinstance(other, Query):
             return False
         return (
-            set(self.antecedent) == set(other.antecedent) and
-            self.question == other.question # and
+            self._hash == other._hash and
+            self.question == other.question and
+            self.antecedent == other.antecedent # and
             #self.answer == other.answer
         )
 
     def __hash__(self) -> int:
-        return hash((frozenset(self.antecedent), self.question))
+        return self._hash
+
+    def __getstate__(self):
+        return self.antecedent, self.question, self.answer
+
+    def __setstate__(self, state):
+        # String hashes differ between processes, so the hash is computed again
+        self.__init__(*state)
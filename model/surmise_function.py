@@ -1,28 +1,137 @@
-from typing import Dict, List, Set
+from typing import Callable, Dict, List, Optional, Set, Tuple
 from model.clause import Clause
+from model.item_index import ItemIndex, iter_bits
 
 class SurmiseFunction:
 
-    def __init__(self):
+    def __init__(self, item_index: Optional[ItemIndex] = None, minimal: bool = False):
         """
         Initializes the SurmiseFunction, which maps each item to a list of clauses (prerequisites).
+        Alongside the clauses, the bitmask of every clause is kept in `clause_masks`
+        (same order as `surmise`), encoded with `item_index`, and every clause is indexed
+        under each of its prerequisite items in `clauses_by_prerequisite`.
+
+        :param item_index: Registry used to encode clauses as bitmasks. A new one is created if omitted.
+        :param minimal: If True, only inclusion-minimal clauses are kept per item: a clause that
+            contains an existing clause of the same item is rejected, and existing clauses that
+            contain a new clause are evicted.
         """
         self.surmise: Dict[str, List[Clause]] = {}
+        self.item_index = item_index if item_index is not None else ItemIndex()
+        self.minimal = minimal
+        self.clause_masks: Dict[str, List[int]] = {}
+        self.clauses_by_prerequisite: Dict[str, List[Tuple[str, int]]] = {}
+        # Subsumption index: item -> postings of its clause masks
+        self.subsumption_index: Dict[str, SubsumptionIndex] = {}
+        # Order-independent XOR of the clause hashes, and a counter bumped on every change
+        self.fingerprint = 0
+        self.version = 0
+        self._listeners: List[Callable[[str, Clause, List[Clause]], None]] = []
+
+    def set_item_index(self, item_index: ItemIndex):
+        """
+        Switch to another item registry and re-encode the masks of all existing clauses.
 
-    def add_clause(self, item: str, prerequisites: Set[str]):
+        :param item_index: The registry to encode clauses with.
+        """
+        self.item_index = item_index
+        self.clause_masks = {}
+        self.clauses_by_prerequisite = {}
+        self.subsumption_index = {}
+        for item, clauses in self.surmise.items():
+            self.clause_masks[item] = []
+            self.subsumption_index[item] = SubsumptionIndex()
+            for clause in clauses:
+                mask = item_index.encode(clause.prerequisites)
+                self.clause_masks[item].append(mask)
+                self._index_clause(clause, mask)
+
+    @staticmethod
+    def _clause_hash(clause: Clause) -> int:
+        return hash(clause) & 0xFFFFFFFFFFFFFFFF
+
+    def _index_clause(self, clause: Clause, mask: int):
+        """Register a clause in the prerequisite and subsumption indexes."""
+        for prerequisite in clause.prerequisites:
+            self.clauses_by_prerequisite.setdefault(prerequisite, []).append((clause.conclusion, mask))
+        self.subsumption_index[clause.conclusion].add(mask)
+
+    def _remove_clause(self, item: str, mask: int) -> Clause:
+        """Remove a clause of `item` from the clause lists and all indexes."""
+        position = self.clause_masks[item].index(mask)
+        clause = self.surmise[item].pop(position)
+        del self.clause_masks[item][position]
+        for prerequisite in clause.prerequisites:
+            self.clauses_by_prerequisite[prerequisite].remove((item, mask))
+        self.subsumption_index[item].remove(mask)
+        self.fingerprint ^= self._clause_hash(clause)
+        self.version += 1
+        return clause
+
+    def add_clause(self, item: str, prerequisites: Set[str]) -> bool:
         """
         Adds a clause for a particular item. A clause represents a set of prerequisites
         that must be mastered to master the item. The item itself is always included.
-        
+
         :param item: The item (task) that the clause pertains to.
         :param prerequisites: A set of items that are prerequisites for mastering the item.
+        :return: True if the clause was added, False if it was already present (or subsumed in minimal mode).
         """
-        clause = Clause(prerequisites, item)
+        mask = self.item_index.encode(prerequisites) | self.item_index.bit(item)
+        clause = self.item_index.clause(mask, item)
         if item not in self.surmise:
             self.surmise[item] = []
+            self.clause_masks[item] = []
+            self.subsumption_index[item] = SubsumptionIndex()
+        index = self.subsumption_index[item]
+
         # Only add if clause is not already in the list
-        if clause not in self.surmise[item]:
-            self.surmise[item].append(clause)
+        if mask in index:
+            return False
+
+        removed = []
+        if self.minimal:
+            # Reject the clause if an existing clause is contained in it, else evict those that contain it
+            if index.has_subset(mask):
+                return False
+            for other in index.supersets(mask):
+                removed.append(self._remove_clause(item, other))
+
+        self.surmise[item].append(clause)
+        self.clause_masks[item].append(mask)
+        self._index_clause(clause, mask)
+        self.fingerprint ^= self._clause_hash(clause)
+        self.version += 1
+
+        for listener in list(self._listeners):
+            listener(item, clause, removed)
+        return True
+
+    def subscribe(self, listener: Callable[[str, Clause, List[Clause]], None]):
+        """
+        Register a callback that is called as `listener(item, added_clause, removed_clauses)`
+        after every change made by add_clause. `removed_clauses` holds the clauses evicted
+        in minimal mode (empty otherwise).
+
+        :param listener: The callback to register.
+        """
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[str, Clause, List[Clause]], None]):
+        """
+        Remove a callback registered with subscribe.
+
+        :param listener: The callback to remove.
+        """
+        self._listeners.remove(listener)
+
+    def changed_since(self, version: int) -> bool:
+        """
+        Returns True if a clause was added or removed after `version` was read from `self.version`.
+
+        :param version: A previously read value of `self.version`.
+        """
+        return self.version != version
 
 
     def get_clauses(self, item: str) -> List[Clause]:
@@ -34,6 +143,32 @@ class SurmiseFunction:
         """
         return self.surmise.get(item, [])
 
+    def mentioned_items(self) -> Set[str]:
+        """Returns every item that has clauses or occurs as a prerequisite."""
+        items = set(self.surmise.keys())
+        for clauses in self.surmise.values():
+            for clause in clauses:
+                items.update(clause.prerequisites)
+        return items
+
+    def get_clause_masks(self, item: str) -> List[int]:
+        """
+        Returns the bitmasks of the clauses for a particular item, in the same order as `get_clauses`.
+
+        :param item: The item whose clause masks we want to retrieve.
+        :return: List of clause bitmasks (encoded with `item_index`).
+        """
+        return self.clause_masks.get(item, [])
+
+    def get_clauses_with_prerequisite(self, item: str) -> List[Tuple[str, int]]:
+        """
+        Returns every clause (of any item) that has `item` among its prerequisites.
+
+        :param item: The prerequisite item.
+        :return: List of (conclusion, clause bitmask) pairs.
+        """
+        return self.clauses_by_prerequisite.get(item, [])
+
     def __repr__(self):
         return f"SurmiseFunction(surmise={self.surmise})"
 
@@ -41,6 +176,10 @@ class SurmiseFunction:
         if not isinstance(other, SurmiseFunction):
             return False
 
+        # Different fingerprints mean different clauses; equal ones still get the full check
+        if self.fingerprint != other.fingerprint:
+            return False
+
         if set(self.surmise.keys()) != set(other.surmise.keys()):
             return False
 
@@ -54,13 +193,72 @@ class SurmiseFunction:
         return True
 
     def __hash__(self):
-        # Must convert unhashable types like lists/sets to sorted tuples
-        return hash(
-            tuple(
-                sorted(
-                    (item, tuple(sorted(self.surmise[item])))
-                    for item in sorted(self.surmise)
-                )
-            )
-        )
+        # Maintained incrementally by add_clause, independent of item and clause order
+        return self.fingerprint
+
+
+class SubsumptionIndex:
+    def __init__(self):
+        """
+        The clause masks of one item, with a posting per prerequisite bit: an int with a bit
+        set for every clause (by slot number) that contains that prerequisite.
+
+        Clauses containing a mask are the AND of the postings of its bits, and clauses
+        contained in it are those outside the OR of the postings of the other bits. Both
+        cost one big-int operation per prerequisite instead of one subset test per clause.
+        """
+        self.slots: Dict[int, int] = {}  # Clause mask -> slot
+        self.slot_masks: List[Optional[int]] = []
+        self.postings: Dict[int, int] = {}  # Single-bit mask -> slots of the clauses containing it
+        self.live = 0  # Slots in use
+        self._free: List[int] = []
+
+    def add(self, mask: int):
+        """Register a clause mask."""
+        slot = self._free.pop() if self._free else len(self.slot_masks)
+        if slot == len(self.slot_masks):
+            self.slot_masks.append(mask)
+        else:
+            self.slot_masks[slot] = mask
+        self.slots[mask] = slot
+        slot_bit = 1 << slot
+        self.live |= slot_bit
+        for bit in iter_bits(mask):
+            self.postings[bit] = self.postings.get(bit, 0) | slot_bit
+
+    def remove(self, mask: int):
+        """Forget a clause mask."""
+        slot = self.slots.pop(mask)
+        slot_bit = 1 << slot
+        self.live &= ~slot_bit
+        for bit in iter_bits(mask):
+            remaining = self.postings[bit] & ~slot_bit
+            if remaining:
+                self.postings[bit] = remaining
+            else:
+                del self.postings[bit]
+        self.slot_masks[slot] = None
+        self._free.append(slot)
+
+    def supersets(self, mask: int) -> List[int]:
+        """Return the clause masks that contain `mask`."""
+        slots = self.live
+        for bit in iter_bits(mask):
+            slots &= self.postings.get(bit, 0)
+            if not slots:
+                return []
+        return [self.slot_masks[slot_bit.bit_length() - 1] for slot_bit in iter_bits(slots)]
+
+    def has_subset(self, mask: int) -> bool:
+        """True if a clause mask is contained in `mask`."""
+        outside = 0
+        for bit, slots in self.postings.items():
+            if not bit & mask:
+                outside |= slots
+        return self.live & ~outside != 0
+
+    def __contains__(self, mask: int) -> bool:
+        return mask in self.slots
 
+    def __len__(self) -> int:
+        return len(self.slots)
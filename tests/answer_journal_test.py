@@ -0,0 +1,78 @@
+import json
+import os
+
+import pytest
+
+from data.answer_journal import AnswerJournal, journal_path, read_answers
+from data.query_manager import QueryManager
+from model.learning_space import LearningSpace
+from model.query import Query
+from model.surmise_function import SurmiseFunction
+
+
+def _answer(antecedent, question, answer):
+    return Query(antecedent=antecedent, question=question, answer=answer)
+
+
+def test_append_compact_and_read(tmp_path):
+    filename = str(tmp_path / "answers.json")
+    with AnswerJournal(filename) as journal:
+        journal.append(_answer({"a"}, "b", 1))
+        journal.append(_answer({"b"}, "c", 0))
+        assert not os.path.exists(filename)
+        assert [entry["question"] for entry in read_answers(filename)] == ["b", "c"]
+
+        journal.compact()
+        assert os.path.getsize(journal_path(filename)) == 0
+        with open(filename) as f:
+            assert json.load(f) == {"answers": [
+                {"antecedent": ["a"], "question": "b", "answer": 1},
+                {"antecedent": ["b"], "question": "c", "answer": 0},
+            ]}
+
+        journal.append(_answer({"a", "c"}, "d", 1))
+    assert [entry["question"] for entry in read_answers(filename)] == ["b", "c", "d"]
+
+
+def test_torn_final_line_and_interrupted_compaction(tmp_path):
+    filename = str(tmp_path / "answers.json")
+    with AnswerJournal(filename) as journal:
+        journal.append(_answer({"a"}, "b", 1))
+        journal.append(_answer({"b"}, "c", 0))
+    # The process died while writing a third record
+    with open(journal_path(filename), "a") as f:
+        f.write('{"seq": 2, "antecedent": ["c"], "que')
+    assert len(read_answers(filename)) == 2
+
+    with AnswerJournal(filename) as journal:
+        journal.append(_answer({"c"}, "d", 1))
+    assert [entry["question"] for entry in read_answers(filename)] == ["b", "c", "d"]
+
+    # JSON file written but journal not yet emptied: the journal's records are not counted twice
+    answers = read_answers(filename)
+    with open(filename, "w") as f:
+        json.dump({"answers": answers}, f)
+    assert len(read_answers(filename)) == 3
+
+
+def test_corrupt_record_is_reported(tmp_path):
+    filename = str(tmp_path / "answers.json")
+    with open(journal_path(filename), "w") as f:
+        f.write("not json\n")
+    with pytest.raises(ValueError):
+        read_answers(filename)
+
+
+def test_start_over_and_load_state(tmp_path):
+    filename = str(tmp_path / "answers.json")
+    with AnswerJournal(filename) as journal:
+        journal.append(_answer({"a"}, "b", 1))
+    with AnswerJournal(filename, resume=False):
+        pass  # Quitting before the first answer keeps the saved answers
+    assert read_answers(filename) == [{"antecedent": ["a"], "question": "b", "answer": 1}]
+    with AnswerJournal(filename, resume=False) as journal:
+        journal.append(_answer({"b"}, "c", 1))
+
+    qm = QueryManager(LearningSpace(["a", "b", "c"], SurmiseFunction()))
+    qm.load_state(filename)
+    assert qm.answered_queries == [_answer({"b"}, "c", 1)]
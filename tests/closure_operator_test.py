@@ -0,0 +1,54 @@
+from model.closure_operator import ClosureOperator
+from model.compiled_surmise import CompiledSurmise
+from model.surmise_function import SurmiseFunction
+from utils.surmise_to_states import surmise_to_states
+
+
+def test_chain(chain_surmise):
+    operator = ClosureOperator(chain_surmise)
+    assert operator.closure({"a"}) == frozenset({"a", "b", "c"})
+    assert operator.closure({"b"}) == frozenset({"b", "c"})
+    assert operator.interior({"b", "c", "d"}) == frozenset({"d"})
+    assert operator.is_state({"a", "b"})
+    assert not operator.is_state({"b"})
+    assert not operator.is_state({"a", "x"})
+
+
+def test_matches_brute_force(random_surmises):
+    for sf in random_surmises(30, max_clauses=12, max_prerequisites=3):
+        operator = ClosureOperator(sf)
+        assert operator.index.items == CompiledSurmise(sf).index.items
+
+        states = [operator.index.encode(state) for state in surmise_to_states(sf)]
+        masks = list(range(operator.full_mask + 1))
+        for mask in masks:
+            interior = 0
+            for state in states:
+                if state & ~mask == 0:
+                    interior |= state
+            assert operator.interior_mask(mask) == interior
+            assert operator.closure_mask(operator.full_mask & ~mask) == operator.full_mask & ~interior
+            assert operator.is_state_mask(mask) == (mask in states)
+
+        assert operator.closure_masks(masks + masks) == [operator.closure_mask(mask) for mask in masks + masks]
+        assert operator.interior_masks(masks) == [operator.interior_mask(mask) for mask in masks]
+        assert operator.is_state_masks(masks) == [operator.is_state_mask(mask) for mask in masks]
+
+
+def test_states_must_be_reachable():
+    # {a, b} has a clause for both items but cannot be reached one item at a time
+    sf = SurmiseFunction()
+    sf.add_clause("a", {"b"})
+    sf.add_clause("b", {"a"})
+    operator = ClosureOperator(sf)
+    assert not operator.is_state({"a", "b"})
+    assert operator.interior({"a", "b"}) == frozenset()
+    assert operator.closure(set()) == frozenset({"a", "b"})
+
+
+def test_unsatisfiable_items_always_fail():
+    sf = SurmiseFunction()
+    sf.add_clause("b", {"x"})
+    operator = ClosureOperator(sf, ["a", "b"])
+    assert operator.closure(set()) == frozenset({"b"})
+    assert operator.interior({"a", "b"}) == frozenset({"a"})
@@ -0,0 +1,39 @@
+import random
+
+import pytest
+
+from model.surmise_function import SurmiseFunction
+
+
+@pytest.fixture
+def chain_surmise():
+    # a ⊢ b ⊢ c, and d is free
+    sf = SurmiseFunction()
+    sf.add_clause("b", {"a"})
+    sf.add_clause("c", {"a", "b"})
+    sf.add_clause("d", set())
+    return sf
+
+
+@pytest.fixture
+def random_clauses():
+    """Factory of reproducible random clauses: (seed, items, n_clauses, max_prerequisites) -> [(item, prerequisites)]."""
+    def generate(seed, items, n_clauses, max_prerequisites=2):
+        rng = random.Random(seed)
+        items = list(items)
+        return [(rng.choice(items), set(rng.sample(items, rng.randint(0, max_prerequisites))))
+                for _ in range(n_clauses)]
+    return generate
+
+
+@pytest.fixture
+def random_surmises(random_clauses):
+    """Factory yielding `n` random surmise functions, one per seed 0..n-1, with 1 to `max_clauses` clauses."""
+    def generate(n=30, items="abcdef", max_clauses=8, max_prerequisites=2):
+        for seed in range(n):
+            sf = SurmiseFunction()
+            n_clauses = random.Random(seed).randint(1, max_clauses)
+            for item, prerequisites in random_clauses(seed, items, n_clauses, max_prerequisites):
+                sf.add_clause(item, prerequisites)
+            yield sf
+    return generate
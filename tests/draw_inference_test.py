@@ -145,3 +145,48 @@ class TestDrawInference(unittest.TestCase):
         self.assertIn(Query(['a', 'p'], 'q', 1), engine.P_yes)  # IR1
         self.assertIn(Query(['a'], 'q', 1), engine.P_yes)       # IR2
 
+
+
+class TestLearningSpaceDrawInference(unittest.TestCase):
+
+    def random_facts(self, seed):
+        import random
+        rng = random.Random(seed)
+        items = ['a', 'b', 'c', 'd', 'e']
+        def random_query(answer):
+            antecedent = rng.sample(items, rng.randint(1, 2))
+            question = rng.choice([i for i in items if i not in antecedent])
+            return Query(antecedent, question, answer)
+        return items, {random_query(1) for _ in range(6)}, {random_query(0) for _ in range(4)}
+
+    def test_semi_naive_matches_reference(self):
+        from model.learning_space import LearningSpace
+        from model.surmise_function import SurmiseFunction
+        for seed in range(20):
+            items, yes, no = self.random_facts(seed)
+            engine = QueryEngine()
+            engine.P_yes, engine.P_no = set(yes), set(no)
+            engine.draw_inference()
+
+            ls = LearningSpace(items, SurmiseFunction())
+            # Feed the facts one at a time, inferring after each like apply_query does
+            for query in yes:
+                ls._accept_yes(query)
+                ls.draw_inference()
+            for query in no:
+                ls._accept_no(query)
+                ls.draw_inference()
+            self.assertEqual(ls.P_yes, engine.P_yes)
+            self.assertEqual(ls.P_no, engine.P_no)
+
+    def test_full_recomputation_is_idempotent(self):
+        from model.learning_space import LearningSpace
+        from model.surmise_function import SurmiseFunction
+        items, yes, no = self.random_facts(0)
+        ls = LearningSpace(items, SurmiseFunction())
+        ls.P_yes, ls.P_no = set(yes), set(no)
+        ls.draw_inference()
+        P_yes, P_no = set(ls.P_yes), set(ls.P_no)
+        ls.draw_inference(semi_naive=False)
+        self.assertEqual(ls.P_yes, P_yes)
+        self.assertEqual(ls.P_no, P_no)
@@ -0,0 +1,34 @@
+from model.surmise_function import SurmiseFunction
+from utils.factorised_states import FactorisedStates
+from utils.surmise_to_states import surmise_to_states
+
+def two_family_surmise():
+    sf = SurmiseFunction()
+    sf.add_clause("b", {"a"})       # a ⊢ b
+    sf.add_clause("y", {"x"})       # x ⊢ y
+    sf.add_clause("z", {"x", "y"})  # x, y ⊢ z
+    return sf
+
+def test_components_are_split():
+    states = FactorisedStates(two_family_surmise())
+    assert states.components == [["a", "b"], ["x", "y", "z"]]
+    assert [len(family) for family in states.families] == [3, 4]
+
+def test_count_membership_and_iteration_match_enumeration():
+    sf = two_family_surmise()
+    states = FactorisedStates(sf)
+    expected = surmise_to_states(sf)
+
+    assert states.count() == len(states) == len(expected) == 12
+    assert set(states) == set(expected)
+    assert all(state in states for state in expected)
+    assert {"b", "x"} not in states
+    assert {"a", "x", "y"} in states
+    assert {"unknown"} not in states
+
+def test_random_surmise_functions_match_enumeration(random_surmises):
+    for sf in random_surmises(30, max_clauses=6):
+        states = FactorisedStates(sf)
+        expected = surmise_to_states(sf)
+        assert states.count() == len(expected)
+        assert sorted(states, key=lambda s: (len(s), sorted(s))) == expected
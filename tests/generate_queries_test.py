@@ -0,0 +1,54 @@
+import itertools
+from random import Random
+
+from data.generate_queries import block_size_total, generate_queries_by_block, random_permutation, sample_queries, unrank_query
+from model.query import Query
+
+
+ITEMS = ["a", "b", "c", "d", "e", "f"]
+
+
+def _block(items, block_size):
+    return [Query(antecedent=list(antecedent), question=question)
+            for antecedent in itertools.combinations(items, block_size)
+            for question in items if question not in antecedent]
+
+
+def test_unrank_matches_enumeration_order():
+    for block_size in range(1, len(ITEMS)):
+        expected = _block(ITEMS, block_size)
+        assert block_size_total(len(ITEMS), block_size) == len(expected)
+        assert [unrank_query(ITEMS, block_size, rank) for rank in range(len(expected))] == expected
+
+
+def test_sample_queries_distinct_and_complete():
+    sample = list(sample_queries(ITEMS, 3, seed=1))
+    assert len(sample) == len(set(sample)) == block_size_total(len(ITEMS), 3)
+    assert set(sample) == set(_block(ITEMS, 3))
+
+
+def test_random_permutation():
+    for total in [0, 1, 2, 5, 64, 65, 1000]:
+        assert sorted(random_permutation(total, Random(total))) == list(range(total))
+    assert list(random_permutation(50, Random(1))) == list(random_permutation(50, Random(1)))
+    assert list(random_permutation(50, Random(1))) != list(random_permutation(50, Random(2)))
+
+
+def test_sample_queries_limit_and_seed():
+    first = list(sample_queries(ITEMS, 2, 10, seed=7))
+    assert len(set(first)) == 10
+    assert first == list(sample_queries(ITEMS, 2, 10, seed=7))
+    assert len(list(sample_queries(ITEMS, 5, 100))) == 6
+    assert list(sample_queries(ITEMS, 6)) == []
+
+
+def test_generate_queries_by_block_with_limits():
+    queries, _ = generate_queries_by_block(ITEMS, 3, {1: None, 2: 5, 3: 0}, seed=3)
+    assert len(queries) == 30 + 5
+    assert len(set(queries)) == len(queries)
+
+
+def test_generate_queries_by_block_seeds_unlimited_blocks():
+    first, _ = generate_queries_by_block(ITEMS, 2, {1: None, 2: None}, seed=5)
+    assert first == generate_queries_by_block(ITEMS, 2, {1: None, 2: None}, seed=5)[0]
+    assert first != generate_queries_by_block(ITEMS, 2, {1: None, 2: None}, seed=6)[0]
@@ -0,0 +1,25 @@
+import pytest
+
+from utils.hasse import covering_edges, write_hasse
+
+
+def naive_covering_edges(states):
+    return {(a, b) for a in states for b in states if a < b and len(b - a) == 1}
+
+
+def test_covering_edges_match_pairwise_definition():
+    states = [frozenset(), frozenset({"a"}), frozenset({"b"}), frozenset({"a", "b"}),
+              frozenset({"a", "b", "c"}), frozenset({"a", "c", "d"})]
+    assert set(covering_edges(states)) == naive_covering_edges(states)
+
+
+def test_write_hasse_dot_is_headless(tmp_path):
+    pytest.importorskip("pydot")
+    states = [frozenset(), frozenset({"a"}), frozenset({"a", "b"})]
+    path = tmp_path / "hasse.dot"
+    write_hasse(states, str(path))
+
+    source = path.read_text(encoding="utf-8")
+    assert "digraph" in source
+    assert source.count("->") == 2
+    assert list(tmp_path.iterdir()) == [path]
@@ -118,3 +118,26 @@ def test_hs_test_fails_when_multiple_clauses_exist_and_one_violates():
 
     # Second clause for 'a' has q ∈ C and A ∩ C = {a} → fails
     assert hs_test(query, sf) is False
+
+
+def test_hs_test_many_matches_hs_test():
+    from model.inference.hs_test import hs_test_many
+    sf = SurmiseFunction()
+    sf.add_clause('a', {'a', 'q'})
+    sf.add_clause('b', {'b', 'x'})
+    sf.add_clause('q', {'a', 'b'})
+
+    queries = [
+        Query(antecedent={'a', 'b'}, question='q'),
+        Query(antecedent={'b'}, question='x'),
+        Query(antecedent={'a', 'q'}, question='x'),
+        Query(antecedent={'b', 'x'}, question='q'),
+        Query(antecedent=set(), question='q'),
+    ]
+    assert hs_test_many(queries, sf) == [hs_test(query, sf) for query in queries]
+    assert hs_test_many(queries, sf) == [False, False, True, True, True]
+
+
+def test_hs_test_many_empty_batch():
+    from model.inference.hs_test import hs_test_many
+    assert hs_test_many([], SurmiseFunction()) == []
@@ -0,0 +1,62 @@
+from model.item_index import ItemIndex, is_subset, is_singleton, popcount
+from model.surmise_function import SurmiseFunction
+from model.learning_space import LearningSpace
+
+def test_encode_decode_roundtrip():
+    index = ItemIndex(["a", "b", "c"])
+    mask = index.encode({"a", "c"})
+    assert mask == 0b101
+    assert index.decode(mask) == frozenset({"a", "c"})
+
+def test_unknown_items_are_registered():
+    index = ItemIndex(["a"])
+    mask = index.encode(["x"])
+    assert "x" in index
+    assert index.decode(mask) == frozenset({"x"})
+    assert len(index) == 2
+
+def test_mask_operations():
+    index = ItemIndex(["a", "b", "c"])
+    ab = index.encode({"a", "b"})
+    abc = index.encode({"a", "b", "c"})
+    assert is_subset(ab, abc)
+    assert not is_subset(abc, ab)
+    assert is_singleton(ab & index.encode({"b", "c"}))
+    assert not is_singleton(ab)
+    assert popcount(abc) == 3
+
+def test_frozenset_masks_are_cached():
+    index = ItemIndex(["a", "b"])
+    items = frozenset({"a", "b"})
+    assert index.encode(items) == index.encode(items) == 0b11
+    assert items in index._masks
+
+def test_surmise_function_masks_follow_learning_space_index():
+    sf = SurmiseFunction()
+    sf.add_clause("q", {"a"})
+    ls = LearningSpace(["q", "a", "b"], sf)
+
+    assert sf.item_index is ls.item_index
+    assert sf.get_clause_masks("q") == [ls.item_index.encode({"a", "q"})]
+
+def test_queries_and_clauses_are_interned():
+    import pickle
+    from model.clause import Clause
+    from model.query import Query
+
+    index = ItemIndex(["a", "b", "c"])
+    ab = index.encode({"a", "b"})
+    query = index.query(ab, "c", 1)
+    assert index.query(ab, "c", 1) is query
+    assert index.query(ab, "c", 0) is not query
+    assert query == Query(["b", "a"], "c") and hash(query) == hash(Query(["a", "b"], "c"))
+    assert query.antecedent is index.query(ab, "b", 0).antecedent
+    assert pickle.loads(pickle.dumps(query)) == query
+
+    index.release_query(ab, "c", 1)
+    assert index.query(ab, "c", 1) is not query
+
+    clause = index.clause(index.encode({"a", "c"}), "c")
+    assert index.clause(index.encode({"a", "c"}), "c") is clause
+    assert clause == Clause({"a"}, "c") and hash(clause) == hash(Clause({"a"}, "c"))
+    assert pickle.loads(pickle.dumps(clause)) == clause
@@ -71,3 +71,77 @@ def test_apply_query_adds_clause_only_when_passing():
 
     # Clause should be added now
     assert any(c.prerequisites == {"a", "b", "q"} for c in sf.surmise["q"])
+
+
+def test_entails_yes_through_chained_answers():
+    ls = LearningSpace(["a", "b", "c", "x"], SurmiseFunction(), materialize_inferences=False)
+    ls.apply_query(Query(antecedent={"a"}, question="b", answer=1))
+    ls.apply_query(Query(antecedent={"b"}, question="c", answer=1))
+
+    assert ls.closure({"a"}) == {"a", "b", "c"}
+    assert ls.entails({"a"}, "c") == 1
+    assert ls.entails({"a", "x"}, "c") == 1
+    assert ls.entails({"c"}, "a") is None
+
+
+def test_entails_no_when_answer_would_contradict_negative():
+    ls = LearningSpace(["a", "b", "c"], SurmiseFunction(), materialize_inferences=False)
+    ls.apply_query(Query(antecedent={"b"}, question="c", answer=1))
+    ls.apply_query(Query(antecedent={"a"}, question="c", answer=0))
+
+    # {a}→b together with {b}→c would give {a}→c
+    assert ls.entails({"a"}, "b") == 0
+    assert ls.entails({"a"}, "c") == 0
+    assert ls.entails({"b"}, "a") is None
+
+
+def test_entailed_questions_agrees_with_entails():
+    import itertools
+    import random
+    rng = random.Random(5)
+    items = ["a", "b", "c", "d", "e"]
+    for _ in range(20):
+        ls = LearningSpace(items, SurmiseFunction(), materialize_inferences=False)
+        for _ in range(6):
+            antecedent = set(rng.sample(items, rng.randint(1, 2)))
+            question = rng.choice([item for item in items if item not in antecedent])
+            ls.apply_query(Query(antecedent=antecedent, question=question, answer=rng.randint(0, 1)))
+        for size in (1, 2, 3):
+            for antecedent in itertools.combinations(items, size):
+                expected = {q: ls.entails(antecedent, q) for q in items if q not in antecedent}
+                expected = {q: answer for q, answer in expected.items() if answer is not None}
+                assert ls.entailed_questions(antecedent) == expected
+
+
+def test_unmaterialized_space_only_stores_answers():
+    ls = LearningSpace(["a", "b", "c"], SurmiseFunction(), materialize_inferences=False)
+    ls.apply_query(Query(antecedent={"a"}, question="b", answer=1))
+    ls.apply_query(Query(antecedent={"b"}, question="c", answer=1))
+
+    assert len(ls.P_yes) == 2
+    assert not ls.inferred_yes
+
+
+def test_second_stage_keeps_failing_queries_pending():
+    sf = SurmiseFunction()
+    sf.add_clause("a", {"q"})
+    ls = LearningSpace(["a", "b", "q"], sf)
+
+    query = Query(antecedent={"a", "b"}, question="q", answer=True)
+    ls.apply_query(query)
+    ls.run_second_stage()
+
+    assert ls.pending_table == [query]
+    assert query not in ls.P_yes
+    assert not ls.r_store
+
+
+def test_second_stage_accepts_passing_pending_queries():
+    ls = LearningSpace(["a", "b", "q"], SurmiseFunction())
+    query = Query(antecedent={"a", "b"}, question="q", answer=True)
+    ls.pending_table = [query]
+    ls.run_second_stage()
+
+    assert ls.pending_table == []
+    assert query in ls.P_yes
+    assert ls.surmise_function.get_clauses("q")
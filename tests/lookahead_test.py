@@ -0,0 +1,92 @@
+import copy
+import itertools
+import random
+
+from data.lookahead import LookaheadEvaluator
+from data.query_manager import QueryManager
+from model.learning_space import LearningSpace
+from model.query import Query
+from model.surmise_function import SurmiseFunction
+
+
+ITEMS = ["a", "b", "c", "d", "e"]
+
+
+def _random_space(rng, n_answers=6):
+    ls = LearningSpace(ITEMS, SurmiseFunction())
+    for _ in range(n_answers):
+        antecedent = set(rng.sample(ITEMS, rng.randint(1, 2)))
+        question = rng.choice([item for item in ITEMS if item not in antecedent])
+        ls.apply_query(Query(antecedent=antecedent, question=question, answer=int(rng.random() < 0.5)))
+    return ls
+
+
+def _candidates():
+    return [Query(antecedent=set(antecedent), question=question)
+            for size in (1, 2)
+            for antecedent in itertools.combinations(ITEMS, size)
+            for question in ITEMS if question not in antecedent]
+
+
+def _state(ls):
+    return (ls.snapshot(), set(ls.P_yes), set(ls.P_no), set(ls.inferred_yes), set(ls.inferred_no),
+            {item: list(keys) for item, keys in ls._yes_by_item.items() if keys},
+            {item: list(keys) for item, keys in ls._no_by_antecedent.items() if keys})
+
+
+def test_evaluate_answer_matches_applying_and_rolls_back():
+    rng = random.Random(11)
+    for _ in range(10):
+        ls = _random_space(rng)
+        before = _state(ls)
+        n_sets = len(ls.item_index._sets)
+        for query in _candidates():
+            for answer in (0, 1):
+                expected_space = copy.deepcopy(ls)
+                n_facts = len(expected_space.P_yes) + len(expected_space.P_no)
+                known = query in expected_space.P_yes or query in expected_space.P_no
+                expected_space.apply_query(Query(query.antecedent, query.question, answer))
+                derived = len(expected_space.P_yes) + len(expected_space.P_no) - n_facts
+                expected = 0 if known or derived == 0 else derived - 1
+                assert ls.evaluate_answer(query, answer) == expected
+        assert _state(ls) == before
+        # Hypothetical antecedents do not stay in the item set caches
+        assert len(ls.item_index._sets) == n_sets
+        assert set(ls.item_index._queries.get(1, ())) <= set(ls._yes_lookup)
+        assert set(ls.item_index._queries.get(0, ())) <= set(ls._no_lookup)
+
+
+def test_capped_evaluation():
+    ls = _random_space(random.Random(2), n_answers=10)
+    before = _state(ls)
+    for query in _candidates():
+        for answer in (0, 1):
+            full = ls.evaluate_answer(query, answer)
+            assert ls.evaluate_answer(query, answer, max_derived=2) == min(full, 2)
+    assert _state(ls) == before
+
+
+def test_snapshot_round_trip():
+    ls = _random_space(random.Random(4))
+    assert LearningSpace.from_snapshot(ls.snapshot()).snapshot() == ls.snapshot()
+
+
+def test_pool_matches_in_process_evaluation():
+    ls = _random_space(random.Random(7))
+    candidates = _candidates()
+    expected = LookaheadEvaluator(ls, processes=0).evaluate(candidates)
+    with LookaheadEvaluator(ls, processes=2, batch_size=7) as evaluator:
+        assert evaluator.evaluate(candidates) == expected
+        # A new answer makes the workers' snapshot stale
+        ls.apply_query(Query(antecedent={"a"}, question="e", answer=1))
+        assert evaluator.evaluate(candidates) == LookaheadEvaluator(ls, processes=0).evaluate(candidates)
+
+
+def test_lookahead_strategy_picks_highest_yield():
+    ls = LearningSpace(["a", "b", "c", "d"], SurmiseFunction())
+    ls.apply_query(Query(antecedent={"b"}, question="c", answer=1))
+    queries = [Query(antecedent={"d"}, question="a"), Query(antecedent={"a"}, question="b")]
+    qm = QueryManager(ls, queries, {1: 2}, strategy="lookahead")
+    qm.evaluator.processes = 0
+    assert qm.get_next_query() == queries[1]
+    qm.close()
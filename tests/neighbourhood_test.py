@@ -0,0 +1,31 @@
+import pytest
+from utils.neighbourhood import NeighbourhoodExplorer
+from utils.surmise_to_states import surmise_to_states
+
+def test_fringes_of_state(chain_surmise):
+    explorer = NeighbourhoodExplorer(chain_surmise)
+    assert explorer.inner_fringe({"a", "b"}) == {"b"}
+    assert explorer.outer_fringe({"a", "b"}) == {"c", "d"}
+    assert explorer.predecessors({"a", "b"}) == [frozenset({"a"})]
+    assert explorer.successors({"a", "b"}) == [frozenset({"a", "b", "c"}), frozenset({"a", "b", "d"})]
+
+def test_rejects_non_states(chain_surmise):
+    explorer = NeighbourhoodExplorer(chain_surmise)
+    assert not explorer.is_state({"b"})
+    with pytest.raises(ValueError):
+        explorer.outer_fringe({"b"})
+
+def test_neighbourhood_radius_and_limit(chain_surmise):
+    explorer = NeighbourhoodExplorer(chain_surmise)
+    assert explorer.neighbourhood(set(), radius=1) == [frozenset(), frozenset({"a"}), frozenset({"d"})]
+    assert explorer.neighbourhood(set(), radius=10) == surmise_to_states(chain_surmise)
+    assert len(explorer.neighbourhood(set(), radius=10, limit=4)) == 4
+
+def test_fringes_match_enumeration(random_surmises):
+    for sf in random_surmises(30):
+        states = set(surmise_to_states(sf))
+        explorer = NeighbourhoodExplorer(sf)
+        for state in states:
+            assert explorer.is_state(state)
+            assert set(explorer.successors(state)) == {s for s in states if state < s and len(s - state) == 1}
+            assert set(explorer.predecessors(state)) == {s for s in states if s < state and len(state - s) == 1}
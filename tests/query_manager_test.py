@@ -0,0 +1,73 @@
+import json
+
+from data.query_manager import QueryManager
+from model.learning_space import LearningSpace
+from model.query import Query
+from model.surmise_function import SurmiseFunction
+
+
+ITEMS = ["a", "b", "c", "d"]
+
+
+def test_open_block_skips_entailed_queries():
+    ls = LearningSpace(ITEMS, SurmiseFunction(), materialize_inferences=False)
+    qm = QueryManager(ls)
+    qm.record_answer(Query(antecedent={"a"}, question="b"), 1)
+
+    assert qm.open_block(2) == 12 - 2
+    # {a}→b decides b for every antecedent containing a
+    assert Query(antecedent={"a", "c"}, question="b") not in qm.active_queries
+    assert Query(antecedent={"a", "d"}, question="b") not in qm.active_queries
+    assert Query(antecedent={"c", "d"}, question="b") in qm.active_queries
+    assert qm.block_count[2] == 10
+
+
+def test_open_block_with_limit():
+    ls = LearningSpace(ITEMS, SurmiseFunction(), materialize_inferences=False)
+    qm = QueryManager(ls, seed=1)
+    assert qm.open_block(1, max_queries=5) == 5
+    assert len(set(qm.active_queries)) == 5
+
+
+def test_blocks_open_lazily_when_active_queries_run_out():
+    ls = LearningSpace(["a", "b"], SurmiseFunction(), materialize_inferences=False)
+    qm = QueryManager(ls, blocks={1: None, 2: 0}, seed=2)
+    assert not qm.active_queries
+
+    asked = []
+    while (query := qm.get_next_query()):
+        asked.append(query)
+        qm.record_answer(query, 1)
+    assert {query.question for query in asked} == {"a", "b"}
+    assert not qm.pending_blocks
+
+
+def test_inference_deactivates_decided_queries():
+    ls = LearningSpace(["a", "b", "c"], SurmiseFunction())
+    queries = [Query(antecedent={"a"}, question="b"), Query(antecedent={"b"}, question="c"),
+               Query(antecedent={"a"}, question="c"), Query(antecedent={"c"}, question="a")]
+    qm = QueryManager(ls, queries, {1: 4})
+
+    qm.record_answer(queries[0], 1)
+    qm.record_answer(queries[1], 1)
+    # {a}→c follows from the two answers and leaves the pool without a filtering pass
+    assert list(qm.active_queries) == [queries[3]]
+    assert queries[2] in qm.deactivated_queries
+    assert qm.block_count[1] == 1
+    assert qm.get_next_query() == queries[3]
+
+
+def test_resumed_answers_are_not_asked_again(tmp_path):
+    filename = tmp_path / "answers.json"
+    answers = [{"antecedent": ["q"], "question": "a", "answer": 1},
+               {"antecedent": ["a"], "question": "q", "answer": 1},  # Pending: fails the HS-test
+               {"antecedent": ["b"], "question": "c", "answer": -1}]
+    filename.write_text(json.dumps({"answers": answers}))
+    ls = LearningSpace(["a", "b", "c", "q"], SurmiseFunction())
+    qm = QueryManager(ls, blocks={1: None}, seed=4)
+    qm.load_state(str(filename))
+    assert Query(["a"], "q") in ls.pending_table
+
+    qm.get_next_query()
+    for entry in answers:
+        assert Query(entry["antecedent"], entry["question"]) not in qm.active_queries
@@ -0,0 +1,57 @@
+import itertools
+import random
+
+import pytest
+
+from data.query_manager import QueryManager
+from data.query_scheduler import InformationGainScheduler
+from model.learning_space import LearningSpace
+from model.query import Query
+from model.surmise_function import SurmiseFunction
+
+
+def _block_queries(items, size):
+    return [Query(antecedent=set(antecedent), question=question)
+            for antecedent in itertools.combinations(items, size)
+            for question in items if question not in antecedent]
+
+
+def test_serves_query_that_decides_most_others():
+    ls = LearningSpace(["a", "b", "c", "d"], SurmiseFunction())
+    ls.apply_query(Query(antecedent={"b"}, question="c", answer=1))
+    queries = [Query(antecedent={"d"}, question="a"), Query(antecedent={"a"}, question="b"),
+               Query(antecedent={"a"}, question="c")]
+    qm = QueryManager(ls, queries, {1: 3}, strategy="information_gain")
+
+    # A yes to {a}→b gives {a}→c by [IR2]
+    assert qm.scheduler.score(queries[1]) == 1
+    assert qm.get_next_query() == queries[1]
+
+
+def test_choice_matches_rescoring_from_scratch():
+    rng = random.Random(3)
+    items = ["a", "b", "c", "d", "e"]
+    for _ in range(5):
+        ls = LearningSpace(items, SurmiseFunction())
+        queries = _block_queries(items, 1) + _block_queries(items, 2)
+        qm = QueryManager(ls, queries, {1: 20, 2: 30}, strategy="information_gain")
+        while (query := qm.get_next_query()):
+            fresh = InformationGainScheduler(ls, qm.active_queries)
+            fresh.add(qm.active_queries)
+            scores = [fresh.score(candidate) for candidate in qm.active_queries]
+            fresh.close()
+            assert qm.scheduler.score(query) == max(scores)
+            assert list(qm.active_queries).index(query) == scores.index(max(scores))
+            active = list(qm.active_queries)
+            ranking = sorted(range(len(scores)), key=lambda i: (-scores[i], i))[:3]
+            assert qm.scheduler.top_queries(3) == [active[i] for i in ranking]
+            qm.record_answer(query, int(rng.random() < 0.4))
+
+
+def test_random_strategy_and_unknown_strategy():
+    ls = LearningSpace(["a", "b"], SurmiseFunction())
+    qm = QueryManager(ls, _block_queries(["a", "b"], 1), {1: 2}, seed=1, strategy="random")
+    assert qm.get_next_query() in qm.active_queries
+    assert qm.get_next_query(random=True) in qm.active_queries
+    with pytest.raises(ValueError):
+        QueryManager(ls, strategy="best")
@@ -0,0 +1,43 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from utils.response_patterns import StateMatrix, response_matrix
+from utils.surmise_to_states import surmise_to_states
+
+
+def test_chain_patterns(chain_surmise):
+    matrix = StateMatrix.from_surmise(chain_surmise)
+    assert matrix.states == surmise_to_states(chain_surmise)
+    responses = response_matrix([{"a", "b"}, {"b"}, {"b", "c", "d"}], matrix.items)
+
+    assert matrix.is_state(responses).tolist() == [True, False, False]
+    assert matrix.min_distances(responses).tolist() == [0, 1, 1]
+    assert matrix.nearest_states(responses)[1] == [frozenset(), frozenset({"a", "b"})]
+    assert matrix.nearest_states(responses)[2] == [frozenset({"a", "b", "c", "d"})]
+
+
+def test_matches_python_hamming_distance():
+    rng = random.Random(5)
+    items = [f"i{k:02d}" for k in range(70)]  # Spans two 64-bit words
+    states = [frozenset(rng.sample(items, rng.randint(0, 70))) for _ in range(40)]
+    patterns = [set(rng.sample(items, rng.randint(0, 70))) for _ in range(25)] + [set(states[3])]
+    matrix = StateMatrix(states, items, max_cells=64)  # Several chunks of students
+    responses = response_matrix(patterns, items)
+
+    expected = [[len(pattern ^ state) for state in states] for pattern in patterns]
+    assert matrix.distances(responses).tolist() == expected
+    assert matrix.min_distances(responses).tolist() == [min(row) for row in expected]
+    assert matrix.is_state(responses).tolist() == [pattern in states for pattern in patterns]
+    distances, nearest = matrix.nearest(responses)
+    assert distances.tolist() == [min(row) for row in expected]
+    assert [numbers.tolist() for numbers in nearest] == \
+        [[number for number, distance in enumerate(row) if distance == min(row)] for row in expected]
+
+
+def test_response_matrix_shape_is_checked():
+    matrix = StateMatrix([frozenset({"a"})], ["a", "b"])
+    with pytest.raises(ValueError):
+        matrix.min_distances(np.zeros((2, 3), dtype=np.uint8))
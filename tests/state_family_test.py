@@ -0,0 +1,54 @@
+import pytest
+from model.surmise_function import SurmiseFunction
+from model.compiled_surmise import CompiledSurmise
+from utils.state_family import StateFamily
+from utils.surmise_to_states import surmise_to_states
+
+def test_first_clause_removes_states():
+    sf = SurmiseFunction()
+    family = StateFamily(sf, ["a", "b"])
+    assert len(family) == 4
+
+    sf.add_clause("b", {"a"})
+    assert family.last_removed == 1
+    assert frozenset({"b"}) not in family
+    assert list(family) == surmise_to_states(sf)
+
+def test_alternative_clause_adds_states():
+    sf = SurmiseFunction()
+    sf.add_clause("c", {"a"})
+    sf.add_clause("b", set())
+    family = StateFamily(sf)
+    assert frozenset({"b", "c"}) not in family
+
+    sf.add_clause("c", {"b"})
+    assert family.last_added == 1
+    assert frozenset({"b", "c"}) in family
+    assert list(family) == surmise_to_states(sf)
+
+def test_close_stops_updates():
+    sf = SurmiseFunction()
+    family = StateFamily(sf, ["a", "b"])
+    family.close()
+    sf.add_clause("b", {"a"})
+    assert len(family) == 4
+
+@pytest.mark.parametrize("minimal", [False, True])
+def test_family_matches_recomputation(minimal, random_clauses):
+    items = ["a", "b", "c", "d", "e"]
+    for seed in range(40):
+        sf = SurmiseFunction(minimal=minimal)
+        family = StateFamily(sf, items)
+        for item, prerequisites in random_clauses(seed, items, 8, max_prerequisites=3):
+            sf.add_clause(item, prerequisites)
+            engine = CompiledSurmise(sf, items)
+            assert list(family) == [engine.decode(state) for state in engine.states()]
+        family.close()
+
+def test_family_with_default_domain_matches_recomputation(random_clauses):
+    for seed in range(40):
+        sf = SurmiseFunction()
+        family = StateFamily(sf)
+        for item, prerequisites in random_clauses(seed, "abcde", 8, max_prerequisites=3):
+            sf.add_clause(item, prerequisites)
+            assert list(family) == surmise_to_states(sf)
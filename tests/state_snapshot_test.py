@@ -0,0 +1,97 @@
+import random
+
+from data.query_manager import QueryManager
+from data.state_snapshot import answers_fingerprint, load_snapshot, write_snapshot
+from model.learning_space import LearningSpace
+from model.query import Query
+from model.surmise_function import SurmiseFunction
+
+
+ITEMS = ["a", "b", "c", "d", "e"]
+
+
+def _answers(seed, n_answers=12):
+    rng = random.Random(seed)
+    answers = []
+    for _ in range(n_answers):
+        antecedent = sorted(rng.sample(ITEMS, rng.randint(1, 2)))
+        question = rng.choice([item for item in ITEMS if item not in antecedent])
+        answers.append({"antecedent": antecedent, "question": question, "answer": int(rng.random() < 0.6)})
+    return answers
+
+
+def _replay(answers):
+    ls = LearningSpace(ITEMS, SurmiseFunction())
+    for entry in answers:
+        ls.apply_query(Query(entry["antecedent"], entry["question"], entry["answer"]))
+    return ls
+
+
+def _state(ls):
+    return (ls.P_yes, ls.P_no, ls.inferred_yes, ls.inferred_no, ls.pending_table,
+            ls.surmise_function.surmise, ls.queries_answered)
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "state.snapshot")
+    for seed in range(10):
+        answers = _answers(seed)
+        original = _replay(answers)
+        write_snapshot(original, path, answers_fingerprint(answers))
+
+        restored = LearningSpace(ITEMS, SurmiseFunction())
+        assert load_snapshot(restored, path, answers_fingerprint(answers))
+        assert _state(restored) == _state(original)
+
+        # Later answers lead to the same state as well
+        for ls in (original, restored):
+            ls.apply_query(Query(["a"], "e", 1))
+            ls.apply_query(Query(["c", "d"], "b", 0))
+        assert _state(restored) == _state(original)
+
+
+def test_stale_snapshot_is_rejected(tmp_path):
+    path = str(tmp_path / "state.snapshot")
+    answers = _answers(1)
+    write_snapshot(_replay(answers), path, answers_fingerprint(answers))
+
+    assert not load_snapshot(LearningSpace(ITEMS, SurmiseFunction()), path, answers_fingerprint(answers[:-1]))
+    assert not load_snapshot(LearningSpace(ITEMS + ["f"], SurmiseFunction()), path, answers_fingerprint(answers))
+    assert not load_snapshot(LearningSpace(ITEMS, SurmiseFunction()), str(tmp_path / "missing"), answers_fingerprint(answers))
+
+
+def test_load_state_builds_then_uses_snapshot(tmp_path):
+    import json
+    filename = tmp_path / "answers.json"
+    snapshot = str(tmp_path / "answers.snapshot")
+    answers = _answers(2)
+    filename.write_text(json.dumps({"answers": answers}))
+
+    first = QueryManager(LearningSpace(ITEMS, SurmiseFunction()))
+    first.load_state(str(filename), snapshot=snapshot)
+    second = QueryManager(LearningSpace(ITEMS, SurmiseFunction()))
+    second.load_state(str(filename), snapshot=snapshot)
+
+    assert _state(second.learning_space) == _state(_replay(answers))
+    assert second.answered_queries == first.answered_queries
+
+
+def test_damaged_snapshot_falls_back_to_replay(tmp_path):
+    import json
+    import os
+    filename = tmp_path / "answers.json"
+    snapshot = str(tmp_path / "answers.snapshot")
+    answers = _answers(3)
+    filename.write_text(json.dumps({"answers": answers}))
+    QueryManager(LearningSpace(ITEMS, SurmiseFunction())).load_state(str(filename), snapshot=snapshot)
+
+    with open(snapshot, "r+b") as f:
+        f.truncate(os.path.getsize(snapshot) // 2)
+    assert not load_snapshot(LearningSpace(ITEMS, SurmiseFunction()), snapshot, answers_fingerprint(answers))
+
+    resumed = QueryManager(LearningSpace(ITEMS, SurmiseFunction()))
+    resumed.load_state(str(filename), snapshot=snapshot)
+    assert _state(resumed.learning_space) == _state(_replay(answers))
+    assert len(resumed.answered_queries) == len(answers)
+    # The replay rebuilt a valid snapshot
+    assert load_snapshot(LearningSpace(ITEMS, SurmiseFunction()), snapshot, answers_fingerprint(answers))
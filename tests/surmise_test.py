@@ -43,3 +43,70 @@ def test_multiple_clauses_same_item():
 def test_get_clauses_for_unknown_item_returns_empty():
     sf = SurmiseFunction()
     assert sf.get_clauses("nonexistent") == []
+
+def test_minimal_mode_rejects_superset_clause():
+    sf = SurmiseFunction(minimal=True)
+    assert sf.add_clause("q", {"a"})
+    assert not sf.add_clause("q", {"a", "b"})
+    assert sf.get_clauses("q") == [Clause({"a"}, "q")]
+
+def test_minimal_mode_evicts_superset_clauses():
+    sf = SurmiseFunction(minimal=True)
+    sf.add_clause("q", {"a", "b"})
+    sf.add_clause("q", {"a", "c"})
+    sf.add_clause("q", {"x"})
+    assert sf.add_clause("q", {"a"})
+
+    assert sf.get_clauses("q") == [Clause({"x"}, "q"), Clause({"a"}, "q")]
+    assert len(sf.get_clause_masks("q")) == 2
+    assert ("q", sf.item_index.encode({"a", "b", "q"})) not in sf.get_clauses_with_prerequisite("b")
+
+def test_minimal_mode_matches_pairwise_subsumption():
+    import random
+    rng = random.Random(2)
+    items = list("abcdefgh")
+    for _ in range(20):
+        sf = SurmiseFunction(minimal=True)
+        expected = []
+        for _ in range(30):
+            prerequisites = frozenset(rng.sample(items, rng.randint(0, 4))) | {"q"}
+            if not any(clause <= prerequisites for clause in expected):
+                expected = [clause for clause in expected if not prerequisites <= clause] + [prerequisites]
+            sf.add_clause("q", prerequisites)
+            assert sf.get_clauses("q") == [Clause(clause, "q") for clause in expected]
+        assert len(sf.subsumption_index["q"]) == len(expected)
+
+def test_default_mode_keeps_non_minimal_clauses():
+    sf = SurmiseFunction()
+    sf.add_clause("q", {"a"})
+    assert sf.add_clause("q", {"a", "b"})
+    assert len(sf.get_clauses("q")) == 2
+
+def test_fingerprint_ignores_insertion_order():
+    sf1 = SurmiseFunction()
+    sf1.add_clause("q", {"a"})
+    sf1.add_clause("r", {"b", "c"})
+    sf2 = SurmiseFunction()
+    sf2.add_clause("r", {"c", "b"})
+    sf2.add_clause("q", {"a"})
+
+    assert sf1 == sf2
+    assert hash(sf1) == hash(sf2)
+    sf2.add_clause("q", {"x"})
+    assert sf1 != sf2
+
+def test_version_tracks_changes():
+    sf = SurmiseFunction(minimal=True)
+    version = sf.version
+    assert not sf.changed_since(version)
+    sf.add_clause("q", {"a", "b"})
+    assert sf.changed_since(version)
+
+    version = sf.version
+    sf.add_clause("q", {"a", "b", "c"})  # Subsumed, nothing changes
+    assert not sf.changed_since(version)
+
+    fingerprint = sf.fingerprint
+    sf.add_clause("q", {"a"})  # Evicts {a, b}
+    assert sf.fingerprint != fingerprint
+    assert sf.fingerprint == hash(Clause({"a"}, "q")) & 0xFFFFFFFFFFFFFFFF
@@ -0,0 +1,60 @@
+from model.surmise_function import SurmiseFunction
+from model.compiled_surmise import CompiledSurmise
+from utils.surmise_to_states import surmise_to_states
+
+def test_surmise_to_states_chain(chain_surmise):
+    states = surmise_to_states(chain_surmise)
+    assert states == [
+        frozenset(),
+        frozenset({"a"}), frozenset({"d"}),
+        frozenset({"a", "b"}), frozenset({"a", "d"}),
+        frozenset({"a", "b", "c"}), frozenset({"a", "b", "d"}),
+        frozenset({"a", "b", "c", "d"}),
+    ]
+
+def test_surmise_to_states_alternative_clauses():
+    sf = SurmiseFunction()
+    sf.add_clause("c", {"a"})
+    sf.add_clause("c", {"b"})
+    states = surmise_to_states(sf)
+    assert frozenset({"b", "c"}) in states
+    assert frozenset({"a", "c"}) in states
+    assert frozenset({"c"}) not in states
+
+def test_compiled_surmise_is_state(chain_surmise):
+    engine = CompiledSurmise(chain_surmise)
+    assert engine.is_state(engine.index.encode({"a", "b"}))
+    assert not engine.is_state(engine.index.encode({"b"}))
+    assert all(engine.is_state(state) for state in engine.states())
+
+def test_unreachable_states_are_not_enumerated():
+    # {a, b} satisfies both clauses but cannot be reached one item at a time
+    sf = SurmiseFunction()
+    sf.add_clause("a", {"b"})
+    sf.add_clause("b", {"a"})
+    engine = CompiledSurmise(sf)
+    assert engine.is_state(engine.index.encode({"a", "b"}))
+    assert surmise_to_states(sf) == [frozenset()]
+
+def test_iter_states_streams_in_same_order(chain_surmise):
+    from utils.surmise_to_states import iter_states
+    assert list(iter_states(chain_surmise)) == surmise_to_states(chain_surmise)
+    assert list(iter_states(chain_surmise, limit=3)) == surmise_to_states(chain_surmise)[:3]
+
+def test_iter_states_max_size_and_count_only(chain_surmise):
+    from utils.surmise_to_states import iter_states
+    assert list(iter_states(chain_surmise, max_size=1)) == [frozenset(), frozenset({"a"}), frozenset({"d"})]
+    assert iter_states(chain_surmise, count_only=True) == 8
+    assert iter_states(chain_surmise, max_size=2, count_only=True) == 5
+    assert iter_states(chain_surmise, limit=4, count_only=True) == 4
+
+def test_depth_first_finds_each_state_once(random_surmises):
+    from utils.surmise_to_states import iter_states
+    for sf in random_surmises(40, "abcdefg", max_clauses=14, max_prerequisites=3):
+        states = surmise_to_states(sf)
+        unordered = list(iter_states(sf, ordered=False))
+        assert len(unordered) == len(states) and set(unordered) == set(states)
+        for max_size in (0, 2, 4):
+            expected = [state for state in states if len(state) <= max_size]
+            assert sorted(iter_states(sf, max_size=max_size, ordered=False), key=sorted) == sorted(expected, key=sorted)
+            assert iter_states(sf, max_size=max_size, count_only=True) == len(expected)
@@ -0,0 +1,90 @@
+from itertools import product
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Set
+
+from model.compiled_surmise import CompiledSurmise
+from model.surmise_function import SurmiseFunction
+
+
+class FactorisedStates:
+    def __init__(self, surmise_function: SurmiseFunction, items: Optional[Iterable[str]] = None):
+        """
+        The knowledge states of a surmise function, stored as a product of independent components.
+
+        Items are connected when they occur together in a clause. Clauses never cross
+        components, so a set of items is a state exactly when its part in every component
+        is a state of that component, and the family is the Cartesian product of the
+        component families. Only the component families are enumerated, so memory is the
+        sum of their sizes instead of their product.
+
+        :param surmise_function: The surmise function.
+        :param items: The item domain. Defaults to every item mentioned in the surmise function.
+        """
+        if items is None:
+            items = surmise_function.mentioned_items()
+        self.components: List[List[str]] = _connected_components(surmise_function, items)
+
+        self.engines: List[CompiledSurmise] = []
+        self.families: List[List[int]] = []
+        self._family_sets: List[Set[int]] = []
+        self._component_of: Dict[str, int] = {}
+        for number, component in enumerate(self.components):
+            engine = CompiledSurmise(surmise_function, component)
+            family = list(engine.states())
+            self.engines.append(engine)
+            self.families.append(family)
+            self._family_sets.append(set(family))
+            for item in component:
+                self._component_of[item] = number
+
+    def count(self) -> int:
+        """Number of knowledge states, computed as the product of the component sizes."""
+        total = 1
+        for family in self.families:
+            total *= len(family)
+        return total
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __contains__(self, state: Iterable[str]) -> bool:
+        parts: Dict[int, Set[str]] = {}
+        for item in state:
+            number = self._component_of.get(item)
+            if number is None:
+                return False
+            parts.setdefault(number, set()).add(item)
+        for number, part in parts.items():
+            if self.engines[number].index.encode(part) not in self._family_sets[number]:
+                return False
+        return True
+
+    def __iter__(self) -> Iterator[FrozenSet[str]]:
+        """Lazily iterate over the product of the component families."""
+        decoded = [[engine.decode(state) for state in family]
+                   for engine, family in zip(self.engines, self.families)]
+        for parts in product(*decoded):
+            yield frozenset().union(*parts)
+
+
+def _connected_components(surmise_function: SurmiseFunction, items: Iterable[str]) -> List[List[str]]:
+    """Group items that share a clause (union-find), each component sorted, components ordered by first item."""
+    parent = {item: item for item in items}
+
+    def find(item):
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    for clauses in surmise_function.surmise.values():
+        for clause in clauses:
+            members = [item for item in clause.prerequisites if item in parent]
+            for other in members[1:]:
+                root_a, root_b = find(members[0]), find(other)
+                if root_a != root_b:
+                    parent[root_b] = root_a
+
+    components: Dict[str, List[str]] = {}
+    for item in sorted(parent):
+        components.setdefault(find(item), []).append(item)
+    return list(components.values())
@@ -1,15 +1,51 @@
-import pydot
-import matplotlib.pyplot as plt
-import matplotlib.image as mpimg
+import os
 import tempfile
 
-def plot_hasse(states, dir_path=None):
+from typing import TYPE_CHECKING, FrozenSet, Iterable, List, Optional, Tuple
+
+from model.item_index import ItemIndex
+
+if TYPE_CHECKING:
+    import pydot
+
+
+def covering_edges(states: Iterable[FrozenSet[str]]) -> List[Tuple[FrozenSet[str], FrozenSet[str]]]:
     """
-    Plot the Hasse diagram of a knowledge space.
-    
-    :param states: list of frozenset objects representing knowledge states
-    :param dir_path: optional directory to store the temporary image file
+    Return the covering pairs (A, B) of a family of states: A ⊂ B and |B - A| == 1.
+
+    Every state is encoded as a bitmask, and for each state and each item it lacks, the
+    mask with that item added is looked up in a hash set. This is O(#states × #items)
+    instead of comparing every pair of states.
+
+    :param states: iterable of frozenset objects representing knowledge states
+    :return: list of (lower state, upper state) pairs
+    """
+    states = list(set(states))
+    index = ItemIndex(sorted(set().union(*states))) if states else ItemIndex()
+    masks = {index.encode(state): state for state in states}
+    full_mask = index.full_mask
+
+    edges = []
+    for mask, state in masks.items():
+        absent = full_mask & ~mask
+        while absent:
+            low = absent & -absent
+            upper = masks.get(mask | low)
+            if upper is not None:
+                edges.append((state, upper))
+            absent ^= low
+    return edges
+
+
+def hasse_graph(states: Iterable[FrozenSet[str]]) -> "pydot.Dot":
+    """
+    Build the pydot graph of the Hasse diagram of a knowledge space.
+
+    :param states: iterable of frozenset objects representing knowledge states
     """
+    # Imported here so that `covering_edges` can be used without pydot installed
+    import pydot
+
     # Ensure unique and sorted states
     states = sorted(set(states), key=lambda s: (len(s), sorted(s)))
 
@@ -24,15 +60,54 @@ def plot_hasse(states, dir_path=None):
         graph.add_node(pydot.Node(label_map[state]))
 
     # Add covering edges: A ⊂ B and |B - A| == 1
-    for i, a in enumerate(states):
-        for b in states[i+1:]:
-            if a < b and len(b - a) == 1:
-                graph.add_edge(pydot.Edge(label_map[a], label_map[b]))
+    for a, b in sorted(covering_edges(states), key=lambda edge: (len(edge[0]), sorted(edge[0]), sorted(edge[1]))):
+        graph.add_edge(pydot.Edge(label_map[a], label_map[b]))
+
+    return graph
+
+
+def write_hasse(states: Iterable[FrozenSet[str]], path: str, fmt: Optional[str] = None):
+    """
+    Write the Hasse diagram of a knowledge space to a file, without any display.
+
+    DOT output is written directly from the graph source; other formats (svg, png, pdf, ...)
+    are rendered by Graphviz through pydot.
+
+    :param states: iterable of frozenset objects representing knowledge states
+    :param path: output file
+    :param fmt: output format; defaults to the file extension of `path`
+    """
+    if fmt is None:
+        fmt = os.path.splitext(path)[1].lstrip(".").lower() or "dot"
+    graph = hasse_graph(states)
+    if fmt in ("dot", "gv", "raw"):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(graph.to_string())
+    else:
+        graph.write(path, format=fmt)
+
+
+def plot_hasse(states, dir_path=None):
+    """
+    Plot the Hasse diagram of a knowledge space.
+
+    :param states: list of frozenset objects representing knowledge states
+    :param dir_path: optional directory to store the temporary image file
+    """
+    # Imported here so that headless use of this module does not need a display backend
+    import matplotlib.pyplot as plt
+    import matplotlib.image as mpimg
+
+    graph = hasse_graph(states)
 
-    # Save and plot image
+    # Save and plot image, removing the temporary file once it is loaded
     fout = tempfile.NamedTemporaryFile(mode='w+b', dir=dir_path, suffix=".png", delete=False)
-    graph.write_png(fout.name)
-    img = mpimg.imread(fout.name)
+    fout.close()
+    try:
+        graph.write_png(fout.name)
+        img = mpimg.imread(fout.name)
+    finally:
+        os.remove(fout.name)
     plt.axis('off')
     plt.imshow(img)
     plt.show()
@@ -0,0 +1,134 @@
+from collections import deque
+from typing import FrozenSet, Iterable, List, Optional, Set
+
+from model.compiled_surmise import CompiledSurmise
+from model.item_index import iter_bits
+from model.surmise_function import SurmiseFunction
+
+
+class NeighbourhoodExplorer:
+    def __init__(self, surmise_function: SurmiseFunction, items: Optional[Iterable[str]] = None):
+        """
+        Explore the knowledge structure of a surmise function around given states, without
+        enumerating the whole space. Everything is computed on demand from the compiled
+        clauses, with the state semantics of `surmise_to_states` (states reachable from
+        the empty state one item at a time).
+
+        :param surmise_function: The surmise function.
+        :param items: The item domain. Defaults to every item mentioned in the surmise function.
+        """
+        self.engine = CompiledSurmise(surmise_function, items)
+
+    def _encode(self, state: Iterable[str]) -> int:
+        items = set(state)
+        unknown = items - set(self.engine.index.positions)
+        if unknown:
+            raise ValueError(f"Unknown items: {sorted(unknown)}")
+        return self.engine.index.encode(items)
+
+    def _is_state(self, mask: int) -> bool:
+        """True if `mask` can be built from the empty state by adding one item at a time."""
+        reached = 0
+        while reached != mask:
+            addable = self.engine.addable(reached) & mask
+            if not addable:
+                return False
+            # Items addable to a state stay addable together, so add them all at once
+            reached |= addable
+        return True
+
+    def _check_state(self, state: Iterable[str]) -> int:
+        mask = self._encode(state)
+        if not self._is_state(mask):
+            raise ValueError(f"Not a knowledge state: {sorted(state)}")
+        return mask
+
+    def is_state(self, state: Iterable[str]) -> bool:
+        """
+        Check whether a set of items is a knowledge state.
+
+        :param state: The items.
+        """
+        try:
+            return self._is_state(self._encode(state))
+        except ValueError:
+            return False
+
+    def inner_fringe(self, state: Iterable[str]) -> Set[str]:
+        """
+        Items of `state` whose removal leaves a knowledge state.
+
+        :param state: A knowledge state.
+        """
+        mask = self._check_state(state)
+        return {item for item in self.engine.index.iter_items(mask)
+                if self._is_state(mask & ~self.engine.index.bit(item))}
+
+    def outer_fringe(self, state: Iterable[str]) -> Set[str]:
+        """
+        Items outside `state` that can be added to it to give a knowledge state.
+
+        :param state: A knowledge state.
+        """
+        mask = self._check_state(state)
+        return set(self.engine.index.iter_items(self.engine.addable(mask)))
+
+    def predecessors(self, state: Iterable[str]) -> List[FrozenSet[str]]:
+        """
+        The knowledge states immediately below `state` (one item less).
+
+        :param state: A knowledge state.
+        """
+        state = frozenset(state)
+        return sorted((state - {item} for item in self.inner_fringe(state)), key=sorted)
+
+    def successors(self, state: Iterable[str]) -> List[FrozenSet[str]]:
+        """
+        The knowledge states immediately above `state` (one item more).
+
+        :param state: A knowledge state.
+        """
+        state = frozenset(state)
+        return sorted((state | {item} for item in self.outer_fringe(state)), key=sorted)
+
+    def neighbourhood(self, state: Iterable[str], radius: int = 1, limit: Optional[int] = None) -> List[FrozenSet[str]]:
+        """
+        The knowledge states within `radius` covering steps (up or down) of `state`.
+
+        :param state: A knowledge state.
+        :param radius: Maximum number of steps from `state`.
+        :param limit: Maximum number of states to return (closest first).
+        :return: The states, sorted by size and then lexicographically.
+        """
+        engine = self.engine
+        start = self._check_state(state)
+        seen = {start}
+        queue = deque([(start, 0)])
+        while queue and (limit is None or len(seen) < limit):
+            mask, distance = queue.popleft()
+            if distance == radius:
+                continue
+            neighbours = [mask | bit for bit in iter_bits(engine.addable(mask))]
+            neighbours += [mask ^ bit for bit in iter_bits(mask) if self._is_state(mask ^ bit)]
+            for neighbour in neighbours:
+                if neighbour not in seen:
+                    seen.add(neighbour)
+                    queue.append((neighbour, distance + 1))
+                    if limit is not None and len(seen) >= limit:
+                        break
+        states = [engine.decode(mask) for mask in seen]
+        return sorted(states, key=lambda s: (len(s), sorted(s)))
+
+    def write_neighbourhood(self, state: Iterable[str], path: str, radius: int = 1, limit: Optional[int] = None):
+        """
+        Write the Hasse diagram of the neighbourhood of `state` to a file (see `utils.hasse.write_hasse`).
+
+        :param state: A knowledge state.
+        :param path: Output file; the format follows its extension (.dot, .svg, ...).
+        :param radius: Maximum number of steps from `state`.
+        :param limit: Maximum number of states on the page.
+        """
+        # pydot is only needed for rendering
+        from utils.hasse import write_hasse
+        write_hasse(self.neighbourhood(state, radius, limit), path)
+
@@ -0,0 +1,127 @@
+import numpy as np
+
+from typing import FrozenSet, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from model.compiled_surmise import CompiledSurmise
+from model.surmise_function import SurmiseFunction
+
+
+def response_matrix(patterns: Iterable[Iterable[str]], items: Sequence[str]) -> np.ndarray:
+    """
+    Build a students × items 0/1 matrix from the sets of items each student solved.
+
+    :param patterns: Per student, the solved items.
+    :param items: The item order of the columns.
+    :return: A uint8 matrix with a 1 where the student solved the item.
+    """
+    positions = {item: column for column, item in enumerate(items)}
+    patterns = list(patterns)
+    matrix = np.zeros((len(patterns), len(positions)), dtype=np.uint8)
+    for row, pattern in enumerate(patterns):
+        matrix[row, [positions[item] for item in pattern]] = 1
+    return matrix
+
+
+class StateMatrix:
+    def __init__(self, states: Iterable[FrozenSet[str]], items: Optional[Sequence[str]] = None,
+                 max_cells: int = 1 << 22):
+        """
+        A family of knowledge states packed into a bit matrix, for scoring student
+        response patterns (students × items, 1 = solved) against it.
+
+        Every state is one row of 64-bit words (`np.packbits`, padded to whole words).
+        A response pattern is packed the same way, XOR'ed with all rows at once and the
+        differing bits are counted with `np.bitwise_count`, so a comparison costs a few
+        word operations instead of a Python loop over items. Students are processed in
+        chunks of at most `max_cells` student-state-word cells to bound memory.
+
+        :param states: The knowledge states, e.g. from `surmise_to_states`.
+        :param items: The item order of response matrices. Defaults to the sorted items of the states.
+        :param max_cells: Size of the intermediate XOR array per chunk of students.
+        """
+        self.states: List[FrozenSet[str]] = [frozenset(state) for state in states]
+        if not self.states:
+            raise ValueError("A state matrix needs at least one state")
+        self.items: List[str] = list(items) if items is not None else sorted(set().union(*self.states))
+        self.n_words = max(1, (len(self.items) + 63) // 64)
+        self.max_cells = max_cells
+        self.words = self._to_words(np.packbits(response_matrix(self.states, self.items), axis=1))
+        self._rows = {row.tobytes(): number for number, row in enumerate(self.words)}
+
+    @classmethod
+    def from_surmise(cls, surmise_function: SurmiseFunction, items: Optional[Iterable[str]] = None,
+                     max_size: Optional[int] = None, **kwargs) -> "StateMatrix":
+        """
+        Pack the states of a surmise function, in the order of `surmise_to_states`.
+
+        :param surmise_function: The surmise function.
+        :param items: The item domain. Defaults to every item mentioned in the surmise function.
+        :param max_size: Only include states with at most this many items.
+        """
+        engine = CompiledSurmise(surmise_function, items)
+        return cls((engine.decode(state) for state in engine.states(max_size)), engine.items, **kwargs)
+
+    def _to_words(self, packed: np.ndarray) -> np.ndarray:
+        padded = np.zeros((packed.shape[0], self.n_words * 8), dtype=np.uint8)
+        padded[:, :packed.shape[1]] = packed
+        return padded.view(np.uint64)
+
+    def pack(self, responses) -> np.ndarray:
+        """
+        Pack a response matrix into rows of 64-bit words.
+
+        :param responses: A students × items 0/1 array in the order of `items` (or one pattern).
+        """
+        responses = np.asarray(responses)
+        if responses.ndim == 1:
+            responses = responses[np.newaxis, :]
+        if responses.ndim != 2 or responses.shape[1] != len(self.items):
+            raise ValueError(f"Expected a students × {len(self.items)} response matrix, got shape {responses.shape}")
+        return self._to_words(np.packbits(responses != 0, axis=1))
+
+    def _blocks(self, words: np.ndarray) -> Iterator[Tuple[int, np.ndarray]]:
+        """Yield (first student, distances of a chunk of packed students to every state)."""
+        rows = max(1, self.max_cells // (len(self.states) * self.n_words))
+        for start in range(0, len(words), rows):
+            xor = words[start:start + rows, np.newaxis, :] ^ self.words[np.newaxis, :, :]
+            yield start, np.bitwise_count(xor).sum(axis=2, dtype=np.int32)
+
+    def distances(self, responses) -> np.ndarray:
+        """Return the students × states matrix of Hamming distances."""
+        blocks = [block for _, block in self._blocks(self.pack(responses))]
+        if not blocks:
+            return np.zeros((0, len(self.states)), dtype=np.int32)
+        return np.concatenate(blocks)
+
+    def is_state(self, responses) -> np.ndarray:
+        """Return, per student, whether the response pattern is one of the states."""
+        words = self.pack(responses)
+        return np.fromiter((row.tobytes() in self._rows for row in words), dtype=bool, count=len(words))
+
+    def min_distances(self, responses) -> np.ndarray:
+        """Return, per student, the Hamming distance to the nearest state."""
+        words = self.pack(responses)
+        result = np.empty(len(words), dtype=np.int32)
+        for start, block in self._blocks(words):
+            result[start:start + len(block)] = block.min(axis=1)
+        return result
+
+    def nearest(self, responses) -> Tuple[np.ndarray, List[np.ndarray]]:
+        """
+        Return, per student, the distance to the nearest state and the row numbers of all
+        states at that distance.
+        """
+        minimum = []
+        nearest = []
+        for _, block in self._blocks(self.pack(responses)):
+            block_minimum = block.min(axis=1)
+            minimum.append(block_minimum)
+            nearest.extend(np.flatnonzero(row == distance) for row, distance in zip(block, block_minimum))
+        if not minimum:
+            return np.zeros(0, dtype=np.int32), []
+        return np.concatenate(minimum), nearest
+
+    def nearest_states(self, responses) -> List[List[FrozenSet[str]]]:
+        """Return, per student, the states nearest to the response pattern."""
+        _, nearest = self.nearest(responses)
+        return [[self.states[number] for number in numbers] for numbers in nearest]
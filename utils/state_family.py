@@ -0,0 +1,161 @@
+from collections import deque
+from typing import FrozenSet, Iterable, Iterator, List, Optional, Set
+
+from model.clause import Clause
+from model.compiled_surmise import CompiledSurmise
+from model.item_index import iter_bits, popcount
+from model.surmise_function import SurmiseFunction
+
+
+class StateFamily:
+    def __init__(self, surmise_function: SurmiseFunction, items: Optional[Iterable[str]] = None):
+        """
+        The knowledge states of a surmise function (as produced by `surmise_to_states`),
+        kept up to date while clauses are added.
+
+        The family subscribes to `add_clause`. The first clause of an item can only remove
+        states: the states containing that item are looked up in a per-item index, the
+        ones violating the clause are dropped, and so are the states that were only
+        reachable through them. A further clause for an item offers an alternative and can
+        only add states: they are grown from the existing states that satisfy the new clause.
+        Either way the cost is proportional to the states affected by the answer.
+
+        :param surmise_function: The surmise function to follow.
+        :param items: Fixed item domain. Defaults to the items mentioned in the surmise
+            function, in which case a clause with new items triggers a full rebuild.
+        """
+        self.surmise_function = surmise_function
+        self._fixed_items = list(items) if items is not None else None
+        self.last_added = 0    # States added by the latest clause
+        self.last_removed = 0  # States removed by the latest clause
+        self._rebuild()
+        surmise_function.subscribe(self._on_clause_added)
+
+    def _rebuild(self):
+        """Enumerate the whole family from scratch."""
+        self.engine = CompiledSurmise(self.surmise_function, self._fixed_items)
+        self.states: Set[int] = set()
+        self.states_by_item: List[Set[int]] = [set() for _ in self.engine.items]
+        for state in self.engine.states():
+            self._add(state)
+
+    def close(self):
+        """Stop following the surmise function."""
+        self.surmise_function.unsubscribe(self._on_clause_added)
+
+    def _add(self, state: int):
+        self.states.add(state)
+        remaining = state
+        while remaining:
+            low = remaining & -remaining
+            self.states_by_item[low.bit_length() - 1].add(state)
+            remaining ^= low
+
+    def _discard(self, state: int):
+        self.states.discard(state)
+        remaining = state
+        while remaining:
+            low = remaining & -remaining
+            self.states_by_item[low.bit_length() - 1].discard(state)
+            remaining ^= low
+
+    def _on_clause_added(self, item: str, clause: Clause, removed: List[Clause]):
+        old_engine = self.engine
+        index = old_engine.index
+        if self._fixed_items is None and not clause.prerequisites.issubset(index.positions):
+            # The domain grows, so every state changes
+            previous = len(self.states)
+            self._rebuild()
+            self.last_added, self.last_removed = len(self.states), previous
+            return
+        if item not in index:
+            self.last_added = self.last_removed = 0
+            return
+
+        self.engine = CompiledSurmise(self.surmise_function, old_engine.items)
+        position = index.positions[item]
+        if old_engine.free_mask >> position & 1:
+            self.last_added, self.last_removed = 0, self._tighten(position)
+        else:
+            self.last_added, self.last_removed = self._relax(position, clause), 0
+
+    def _tighten(self, position: int) -> int:
+        """Drop the states that violate the first clause of an item, and those only reachable through them."""
+        doomed = [state for state in self.states_by_item[position]
+                  if not self.engine.can_add(state & ~(1 << position), position)]
+        for state in doomed:
+            self._discard(state)
+
+        full_mask = self.engine.full_mask
+        queue = deque(doomed)
+        n_removed = len(doomed)
+        while queue:
+            state = queue.popleft()
+            absent = full_mask & ~state
+            while absent:
+                low = absent & -absent
+                absent ^= low
+                successor = state | low
+                if successor in self.states and not self._has_predecessor(successor):
+                    self._discard(successor)
+                    queue.append(successor)
+                    n_removed += 1
+        return n_removed
+
+    def _has_predecessor(self, state: int) -> bool:
+        remaining = state
+        while remaining:
+            low = remaining & -remaining
+            if state ^ low in self.states:
+                return True
+            remaining ^= low
+        return False
+
+    def _relax(self, position: int, clause: Clause) -> int:
+        """Add the states that become reachable through a new alternative clause of an item."""
+        engine = self.engine
+        bit = 1 << position
+        if not clause.prerequisites.issubset(engine.index.positions):
+            return 0
+        rest = engine.index.encode(clause.prerequisites) & ~bit
+
+        # Every new state is reached from an existing state S with rest ⊆ S, by adding the item
+        if rest:
+            candidates = min(
+                (self.states_by_item[low.bit_length() - 1] for low in iter_bits(rest)),
+                key=len
+            )
+        else:
+            candidates = self.states
+        queue = deque()
+        for state in list(candidates):
+            if not state & bit and rest & ~state == 0 and state | bit not in self.states:
+                self._add(state | bit)
+                queue.append(state | bit)
+
+        n_added = len(queue)
+        while queue:
+            state = queue.popleft()
+            for low in iter_bits(engine.addable(state)):
+                successor = state | low
+                if successor not in self.states:
+                    self._add(successor)
+                    queue.append(successor)
+                    n_added += 1
+        return n_added
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    def __contains__(self, state: Iterable[str]) -> bool:
+        positions = self.engine.index.positions
+        items = set(state)
+        if not items.issubset(positions):
+            return False
+        return self.engine.index.encode(items) in self.states
+
+    def __iter__(self) -> Iterator[FrozenSet[str]]:
+        """Iterate over the states in the order of `surmise_to_states`."""
+        for state in sorted(self.states, key=lambda mask: (popcount(mask), -mask)):
+            yield self.engine.decode(state)
+
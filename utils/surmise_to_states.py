@@ -1,38 +1,47 @@
 from model.surmise_function import SurmiseFunction
+from model.compiled_surmise import CompiledSurmise
 
-from collections import deque
-from typing import List, FrozenSet
+from itertools import islice
+from typing import Iterator, List, FrozenSet, Optional, Union
 
 def surmise_to_states(sf: SurmiseFunction) -> List[FrozenSet[str]]:
-    # Collect all items (keys + prerequisites)
-    items = set(sf.surmise.keys())
-    for clauses in sf.surmise.values():
-        for clause in clauses:
-            items.update(clause.prerequisites)
-
-    initial_state = frozenset()
-    states = set([initial_state])
-    queue = deque([initial_state])
-
-    while queue:
-        state = queue.popleft()
-
-        for item in items:
-            if item not in state:
-                new_state = frozenset(state | {item})
-                # Check if new_state is valid
-                # For each item in new_state, check if one clause is satisfied
-                valid = True
-                for it in new_state:
-                    clauses = sf.get_clauses(it)
-                    if clauses and not any(clause.is_satisfied_by(new_state) for clause in clauses):
-                        valid = False
-                        break
-
-                if valid and new_state not in states:
-                    states.add(new_state)
-                    queue.append(new_state)
-
-    # Return sorted list of states (by size, lex)
-    return sorted(states, key=lambda s: (len(s), sorted(s)))
-
+    """
+    Return the knowledge states of a surmise function, sorted by size and then lexicographically.
+
+    The surmise function is compiled into bitmask clauses and the states are enumerated
+    by the level-wise search in `CompiledSurmise.states`: starting from the empty state,
+    a state is extended by every item one of whose clauses it then satisfies.
+    """
+    return list(iter_states(sf))
+
+
+def iter_states(
+    sf: SurmiseFunction,
+    limit: Optional[int] = None,
+    max_size: Optional[int] = None,
+    count_only: bool = False,
+    ordered: bool = True
+) -> Union[Iterator[FrozenSet[str]], int]:
+    """
+    Stream the knowledge states of a surmise function in the order of `surmise_to_states`,
+    without collecting them first.
+
+    The ordered stream holds one level of states at a time. With `ordered=False`, and for
+    `count_only`, the states are found depth first (`CompiledSurmise.states_depth_first`),
+    which only holds the current path, so memory does not grow with the structure.
+
+    :param sf: The surmise function.
+    :param limit: Stop after this many states.
+    :param max_size: Only produce states with at most this many items.
+    :param count_only: Return the number of states instead of the states themselves.
+    :param ordered: Produce the states in the order of `surmise_to_states`.
+    :return: A generator of states, or their number if `count_only` is set.
+    """
+    engine = CompiledSurmise(sf)
+    if count_only or not ordered:
+        states = islice(engine.states_depth_first(max_size), limit)
+    else:
+        states = islice(engine.states(max_size), limit)
+    if count_only:
+        return sum(1 for _ in states)
+    return (engine.decode(state) for state in states)